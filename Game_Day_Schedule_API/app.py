@@ -1,59 +1,85 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import requests
-import os
+
+from cache import ResponseCache
+from http_client import get_session
+from schedule import (
+    SERP_API_URL, LEAGUES, LEAGUES_WITH_PATH_ERROR, NO_LEAGUES_ERROR, SerpAPIError,
+    search_params, parse_schedule, parse_leagues
+)
 
 app = Flask(__name__)
 
-SERP_API_URL = "https://serpapi.com/search.json"
-SERP_API_KEY = os.getenv("SERP_API_KEY")  # Fixed environment variable name
+cache = ResponseCache()
+executor = ThreadPoolExecutor(max_workers=len(LEAGUES))
+
+
+def fetch_schedule(league):
+    response = get_session().get(SERP_API_URL, params=search_params(league))
+    response.raise_for_status()
+    return parse_schedule(response.json())
+
+
+def get_league_schedule(league):
+    # Each league is cached on its own, so a batch only waits on the leagues that missed
+    return cache.get(league, partial(fetch_schedule, league))
+
+
+def error_response(e):
+    if isinstance(e, SerpAPIError):
+        return {"message": str(e)}
+    if isinstance(e, requests.exceptions.RequestException):
+        return {"message": "HTTP request failed", "error": str(e)}
+    return {"message": "Internal server error", "error": str(e)}
+
 
 @app.route('/sports', methods=['GET'])  # More specific endpoint
-def get_nfl_schedule():
+@app.route('/sports/<league>', methods=['GET'])
+def get_schedule(league=None):
+    leagues_param = request.args.get("leagues")
+    if leagues_param and league is not None:
+        return jsonify(LEAGUES_WITH_PATH_ERROR), 400
+    if leagues_param:
+        leagues = parse_leagues(leagues_param)
+        if not leagues:
+            return jsonify(NO_LEAGUES_ERROR), 400
+        return get_schedules(leagues)
+
+    league = (league or "nfl").lower()
+    if league not in LEAGUES:
+        return jsonify({"message": f"Unknown league: {league}"}), 404
     try:
-        params = {
-            "engine": "google_events",  # Adjusted engine for events/sports
-            "q": "nfl schedule",
-            "api_key": SERP_API_KEY,
-            "hl": "en"  # Example: Language parameter
-        }
-        response = requests.get(SERP_API_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        # Check for SerpAPI-specific errors (e.g., invalid key)
-        if "error" in data:
-            return jsonify({"message": data.get("error", "SerpAPI error")}), 500
-
-        games = data.get("sports_results", {}).get("games", [])
-        if not games:
-            return jsonify({"message": "No NFL schedule found.", "games": []}), 200
-
-        formatted_games = []
-        for game in games:
-            teams = game.get("teams", [])
-            # Find home/away teams using 'type' field
-            home_team = next((t.get("name") for t in teams if t.get("type") == "home"), "Unknown")
-            away_team = next((t.get("name") for t in teams if t.get("type") == "away"), "Unknown")
-
-            raw_time = game.get("time", "Unknown")
-            # Avoid adding " ET" if already present
-            time = f"{raw_time} ET" if raw_time != "Unknown" and "ET" not in raw_time else raw_time
-
-            game_info = {
-                "away_team": away_team,
-                "home_team": home_team,
-                "venue": game.get("venue", "Unknown"),
-                "date": game.get("date", "Unknown"),
-                "time": time
-            }
-            formatted_games.append(game_info)
+        # Errors are raised, not cached, so the next request retries SerpAPI
+        formatted_games = get_league_schedule(league)
+        if not formatted_games:
+            return jsonify({"message": f"No {league.upper()} schedule found.", "games": []}), 200
 
         return jsonify({"message": "Success", "games": formatted_games}), 200
 
-    except requests.exceptions.RequestException as e:
-        return jsonify({"message": "HTTP request failed", "error": str(e)}), 500
     except Exception as e:
-        return jsonify({"message": "Internal server error", "error": str(e)}), 500
+        return jsonify(error_response(e)), 500
+
+
+def get_schedules(leagues):
+    unknown = [league for league in leagues if league not in LEAGUES]
+    if unknown:
+        return jsonify({"message": f"Unknown league: {', '.join(unknown)}"}), 404
+
+    # Fetch every league at once; each game is tagged with its league
+    leagues = list(dict.fromkeys(leagues))
+    futures = {league: executor.submit(get_league_schedule, league) for league in leagues}
+    games, errors = [], {}
+    for league, future in futures.items():
+        try:
+            games.extend(dict(game, league=league) for game in future.result())
+        except Exception as e:
+            errors[league] = error_response(e)
+
+    if len(errors) == len(leagues):
+        return jsonify({"message": "All schedule requests failed", "errors": errors}), 500
+    return jsonify({"message": "Success", "games": games, "errors": errors}), 200
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=8080)
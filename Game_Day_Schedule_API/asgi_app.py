@@ -0,0 +1,106 @@
+import asyncio
+import os
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from schedule import (
+    SERP_API_URL, LEAGUES, LEAGUES_WITH_PATH_ERROR, NO_LEAGUES_ERROR, SerpAPIError,
+    search_params, parse_schedule, parse_leagues
+)
+from cache import AsyncResponseCache
+
+# Connections to SerpAPI are kept open and reused across requests
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+
+cache = AsyncResponseCache()
+client = None
+
+
+async def startup():
+    global client
+    client = httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS)
+    )
+
+
+async def shutdown():
+    await client.aclose()
+
+
+async def fetch_schedule(league):
+    response = await client.get(SERP_API_URL, params=search_params(league))
+    response.raise_for_status()
+    return parse_schedule(response.json())
+
+
+async def get_league_schedule(league):
+    # Each league is cached on its own, so a batch only waits on the leagues that missed
+    return await cache.get(league, lambda: fetch_schedule(league))
+
+
+def error_response(e):
+    if isinstance(e, SerpAPIError):
+        return {"message": str(e)}
+    if isinstance(e, httpx.HTTPError):
+        return {"message": "HTTP request failed", "error": str(e)}
+    return {"message": "Internal server error", "error": str(e)}
+
+
+async def get_schedule(request):
+    # Same JSON contract as the Flask app in app.py
+    leagues_param = request.query_params.get("leagues")
+    if leagues_param and "league" in request.path_params:
+        return JSONResponse(LEAGUES_WITH_PATH_ERROR, status_code=400)
+    if leagues_param:
+        leagues = parse_leagues(leagues_param)
+        if not leagues:
+            return JSONResponse(NO_LEAGUES_ERROR, status_code=400)
+        return await get_schedules(leagues)
+
+    league = request.path_params.get("league", "nfl").lower()
+    if league not in LEAGUES:
+        return JSONResponse({"message": f"Unknown league: {league}"}, status_code=404)
+    try:
+        formatted_games = await get_league_schedule(league)
+        if not formatted_games:
+            return JSONResponse({"message": f"No {league.upper()} schedule found.", "games": []}, status_code=200)
+
+        return JSONResponse({"message": "Success", "games": formatted_games}, status_code=200)
+
+    except Exception as e:
+        return JSONResponse(error_response(e), status_code=500)
+
+
+async def get_schedules(leagues):
+    unknown = [league for league in leagues if league not in LEAGUES]
+    if unknown:
+        return JSONResponse({"message": f"Unknown league: {', '.join(unknown)}"}, status_code=404)
+
+    # Fetch every league at once; each game is tagged with its league
+    leagues = list(dict.fromkeys(leagues))
+    results = await asyncio.gather(*(get_league_schedule(league) for league in leagues), return_exceptions=True)
+    games, errors = [], {}
+    for league, result in zip(leagues, results):
+        if isinstance(result, Exception):
+            errors[league] = error_response(result)
+        else:
+            games.extend(dict(game, league=league) for game in result)
+
+    if len(errors) == len(leagues):
+        return JSONResponse({"message": "All schedule requests failed", "errors": errors}, status_code=500)
+    return JSONResponse({"message": "Success", "games": games, "errors": errors}, status_code=200)
+
+
+app = Starlette(
+    routes=[
+        Route("/sports", get_schedule, methods=["GET"]),
+        Route("/sports/{league}", get_schedule, methods=["GET"])
+    ],
+    on_startup=[startup],
+    on_shutdown=[shutdown]
+)
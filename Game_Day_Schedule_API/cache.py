@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))  # Seconds a cached response counts as fresh
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", "600"))  # Extra seconds a stale response may still be served
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # "memory" (per worker) or "redis" (shared)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class MemoryBackend:
+    """Cache entries in this process only."""
+
+    def __init__(self):
+        self.entries = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def set(self, key, entry, expire):
+        with self.lock:
+            self.entries[key] = entry
+
+    def try_lock(self, key, seconds):
+        # Lets only one caller refresh a stale entry at a time
+        with self.lock:
+            now = time.time()
+            if self.locks.get(key, 0) > now:
+                return False
+            self.locks[key] = now + seconds
+            return True
+
+    def unlock(self, key):
+        with self.lock:
+            self.locks.pop(key, None)
+
+
+class RedisBackend:
+    """Cache entries in Redis so every gunicorn worker shares them."""
+
+    def __init__(self, url=REDIS_URL):
+        import redis  # Only needed when CACHE_BACKEND=redis
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self.client.get(f"cache:{key}")
+        return json.loads(raw) if raw else None
+
+    def set(self, key, entry, expire):
+        self.client.set(f"cache:{key}", json.dumps(entry), ex=expire)
+
+    def try_lock(self, key, seconds):
+        return bool(self.client.set(f"lock:{key}", "1", nx=True, ex=seconds))
+
+    def unlock(self, key):
+        self.client.delete(f"lock:{key}")
+
+
+class ResponseCache:
+    """
+    TTL cache with stale-while-revalidate.
+    Fresh entries are returned as is. Stale entries are returned immediately while one
+    background thread refreshes them. On a miss, concurrent callers for the same key
+    wait for a single upstream call instead of each making their own.
+    """
+
+    def __init__(self, backend=None, ttl=CACHE_TTL, stale_ttl=CACHE_STALE_TTL):
+        self.backend = backend or make_backend()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.key_locks = {}
+        self.lock = threading.Lock()
+
+    def _key_lock(self, key):
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def _store(self, key, fetch):
+        value = fetch()
+        self.backend.set(key, {"value": value, "stored_at": time.time()}, self.ttl + self.stale_ttl)
+        return value
+
+    def _refresh(self, key, fetch):
+        try:
+            self._store(key, fetch)
+        except Exception as e:
+            # Keep serving the stale value; the next request will try again
+            print(f"Background refresh of {key} failed: {e}")
+        finally:
+            self.backend.unlock(key)
+
+    def get(self, key, fetch):
+        """Return the cached value for key, calling fetch() to fill or refresh it."""
+        entry = self.backend.get(key)
+        if entry is not None:
+            age = time.time() - entry["stored_at"]
+            if age < self.ttl:
+                return entry["value"]
+            if age < self.ttl + self.stale_ttl:
+                if self.backend.try_lock(key, self.ttl):
+                    threading.Thread(target=self._refresh, args=(key, fetch), daemon=True).start()
+                return entry["value"]
+
+        # Miss: the first caller fetches, the rest wait on the lock and reuse its result
+        with self._key_lock(key):
+            entry = self.backend.get(key)
+            if entry is not None and time.time() - entry["stored_at"] < self.ttl:
+                return entry["value"]
+            return self._store(key, fetch)
+
+
+class AsyncResponseCache(ResponseCache):
+    """ResponseCache for asyncio apps: fetch is a coroutine function and nothing blocks the event loop."""
+
+    def __init__(self, backend=None, ttl=CACHE_TTL, stale_ttl=CACHE_STALE_TTL):
+        super().__init__(backend, ttl, stale_ttl)
+        self.refreshing = set()  # Keeps background refresh tasks referenced until they finish
+
+    async def _backend(self, method, *args):
+        # The memory backend never blocks; Redis calls run on a worker thread
+        if isinstance(self.backend, MemoryBackend):
+            return method(*args)
+        return await asyncio.to_thread(method, *args)
+
+    def _key_lock(self, key):
+        return self.key_locks.setdefault(key, asyncio.Lock())
+
+    async def _store(self, key, fetch):
+        value = await fetch()
+        entry = {"value": value, "stored_at": time.time()}
+        await self._backend(self.backend.set, key, entry, self.ttl + self.stale_ttl)
+        return value
+
+    async def _refresh(self, key, fetch):
+        try:
+            await self._store(key, fetch)
+        except Exception as e:
+            print(f"Background refresh of {key} failed: {e}")
+        finally:
+            await self._backend(self.backend.unlock, key)
+
+    async def get(self, key, fetch):
+        """Return the cached value for key, awaiting fetch() to fill or refresh it."""
+        entry = await self._backend(self.backend.get, key)
+        if entry is not None:
+            age = time.time() - entry["stored_at"]
+            if age < self.ttl:
+                return entry["value"]
+            if age < self.ttl + self.stale_ttl:
+                if await self._backend(self.backend.try_lock, key, self.ttl):
+                    task = asyncio.create_task(self._refresh(key, fetch))
+                    self.refreshing.add(task)
+                    task.add_done_callback(self.refreshing.discard)
+                return entry["value"]
+
+        async with self._key_lock(key):
+            entry = await self._backend(self.backend.get, key)
+            if entry is not None and time.time() - entry["stored_at"] < self.ttl:
+                return entry["value"]
+            return await self._store(key, fetch)
+
+
+def make_backend(name=CACHE_BACKEND):
+    if name == "redis":
+        return RedisBackend()
+    if name == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND: {name}")
@@ -0,0 +1,67 @@
+import os
+
+SERP_API_URL = "https://serpapi.com/search.json"
+SERP_API_KEY = os.getenv("SERP_API_KEY")  # Fixed environment variable name
+
+# SerpAPI search for each league served at /sports/<league>
+LEAGUES = {
+    "nfl": "nfl schedule",
+    "nba": "nba schedule",
+    "ncaa": "ncaa basketball schedule",
+    "nhl": "nhl schedule",
+    "mlb": "mlb schedule"
+}
+
+# ?leagues= given, but with no league names in it (e.g. "?leagues=,")
+NO_LEAGUES_ERROR = {"message": f"No league given in ?leagues=. Valid leagues: {', '.join(LEAGUES)}"}
+# /sports/<league> names a single league, so ?leagues= is only accepted on /sports
+LEAGUES_WITH_PATH_ERROR = {"message": "Use either /sports/<league> or /sports?leagues=, not both."}
+
+
+class SerpAPIError(Exception):
+    """SerpAPI answered, but with an error (e.g., invalid key)."""
+
+
+def search_params(league):
+    return {
+        "engine": "google_events",  # Adjusted engine for events/sports
+        "q": LEAGUES[league],
+        "api_key": SERP_API_KEY,
+        "hl": "en"  # Example: Language parameter
+    }
+
+
+def parse_schedule(data):
+    # Check for SerpAPI-specific errors (e.g., invalid key)
+    if "error" in data:
+        raise SerpAPIError(data.get("error", "SerpAPI error"))
+
+    games = data.get("sports_results", {}).get("games", [])
+    return format_games(games)
+
+
+def format_games(games):
+    formatted_games = []
+    for game in games:
+        teams = game.get("teams", [])
+        # Find home/away teams using 'type' field
+        home_team = next((t.get("name") for t in teams if t.get("type") == "home"), "Unknown")
+        away_team = next((t.get("name") for t in teams if t.get("type") == "away"), "Unknown")
+
+        raw_time = game.get("time", "Unknown")
+        # Avoid adding " ET" if already present
+        time = f"{raw_time} ET" if raw_time != "Unknown" and "ET" not in raw_time else raw_time
+
+        game_info = {
+            "away_team": away_team,
+            "home_team": home_team,
+            "venue": game.get("venue", "Unknown"),
+            "date": game.get("date", "Unknown"),
+            "time": time
+        }
+        formatted_games.append(game_info)
+    return formatted_games
+
+
+def parse_leagues(leagues_param):
+    return [name.strip().lower() for name in leagues_param.split(",") if name.strip()]
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# app.py and asgi_app.py import their neighbours by name, as they do inside the container.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
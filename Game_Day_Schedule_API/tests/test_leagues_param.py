@@ -0,0 +1,55 @@
+import pytest
+from starlette.testclient import TestClient
+
+import app
+import asgi_app
+from schedule import LEAGUES
+
+
+class FlaskClient:
+    def __init__(self):
+        self.client = app.app.test_client()
+
+    def get(self, url):
+        response = self.client.get(url)
+        return response.status_code, response.get_json()
+
+
+class ASGIClient:
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, url):
+        response = self.client.get(url)
+        return response.status_code, response.json()
+
+
+@pytest.fixture(params=["flask", "asgi"])
+def client(request):
+    if request.param == "flask":
+        yield FlaskClient()
+    else:
+        with TestClient(asgi_app.app) as test_client:
+            yield ASGIClient(test_client)
+
+
+@pytest.mark.parametrize("leagues", [",", "%20", " , ,"])
+def test_leagues_param_without_names_is_a_bad_request(client, leagues):
+    status, body = client.get(f"/sports?leagues={leagues}")
+
+    assert status == 400
+    assert all(league in body["message"] for league in LEAGUES)
+
+
+def test_leagues_param_on_the_league_path_is_a_bad_request(client):
+    status, body = client.get("/sports/nba?leagues=nfl,nhl")
+
+    assert status == 400
+    assert "not both" in body["message"]
+
+
+def test_unknown_league_in_leagues_param_is_not_found(client):
+    status, body = client.get("/sports?leagues=nfl,cricket")
+
+    assert status == 404
+    assert body["message"] == "Unknown league: cricket"
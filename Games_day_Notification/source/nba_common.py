@@ -0,0 +1,290 @@
+"""
+Game state, change detection, the conditional GamesByDate fetch and SNS publishing used by
+both NBA notification Lambdas (game-day-notifications_terraform and Games_day_Notification).
+This module is copied unchanged into each project, which is deployed on its own;
+keep the copies identical.
+"""
+import os
+import json
+import hashlib
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+
+# Created once per Lambda container so warm invocations reuse the open connection
+http = urllib3.PoolManager(
+    maxsize=int(os.getenv("HTTP_POOL_SIZE", "2")),
+    timeout=urllib3.Timeout(connect=5, read=float(os.getenv("HTTP_TIMEOUT", "10"))),
+    retries=urllib3.Retry(total=int(os.getenv("HTTP_MAX_RETRIES", "3")), backoff_factor=0.5,
+                          status_forcelist=(429, 500, 502, 503, 504))
+)
+
+# Validators of the last GamesByDate response that was fully processed, so an unchanged
+# payload comes back as 304 Not Modified (or matches by hash) and is skipped unparsed
+HTTP_CACHE_FILE = os.getenv("HTTP_CACHE_FILE", "/tmp/nba_games_http_cache.json")
+# Set LOG_LEVEL=DEBUG to log the raw API response
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Each changed game is published once per team, tagged with a "team" message attribute so
+# subscription filter policies route it. PublishBatch takes at most 10 messages per call,
+# and PUBLISH_CONCURRENCY batches are sent at once
+PUBLISH_BATCH_SIZE = 10
+PUBLISH_CONCURRENCY = int(os.getenv("PUBLISH_CONCURRENCY", "8"))
+
+# AWS clients live at module scope, so warm invocations skip client construction
+_clients = {}
+
+
+def get_client(service, region_name=None):
+    if service not in _clients:
+        import boto3  # Imported on first use so the init phase only loads what it needs
+        _clients[service] = boto3.client(service, region_name=region_name)
+    return _clients[service]
+
+
+# Last-seen state of each game is kept in a DynamoDB table (STATE_TABLE) or, when that
+# is unset, in a local JSON file that only lives as long as the container
+STATE_TABLE = os.getenv("STATE_TABLE")
+STATE_FILE = os.getenv("STATE_FILE", "/tmp/nba_game_state.json")
+# Combined points scored since the last notification that are worth a score update
+SCORE_CHANGE_THRESHOLD = int(os.getenv("SCORE_CHANGE_THRESHOLD", "10"))
+
+FINAL_STATUSES = {"Final", "F/OT"}
+
+
+class DynamoDBStateStore:
+    """Game state in a DynamoDB table keyed by GameID (Number), stored as a JSON string."""
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+
+    def load(self, game_ids):
+        dynamodb = get_client("dynamodb")
+        game_ids = list(game_ids)
+        states = {}
+        # BatchGetItem takes at most 100 keys per call
+        for start in range(0, len(game_ids), 100):
+            keys = [{"GameID": {"N": str(game_id)}} for game_id in game_ids[start:start + 100]]
+            request = {self.table_name: {"Keys": keys}}
+            while request:
+                response = dynamodb.batch_get_item(RequestItems=request)
+                for item in response["Responses"].get(self.table_name, []):
+                    states[int(item["GameID"]["N"])] = json.loads(item["State"]["S"])
+                request = response.get("UnprocessedKeys")
+        return states
+
+    def save(self, states):
+        dynamodb = get_client("dynamodb")
+        for game_id, state in states.items():
+            dynamodb.put_item(
+                TableName=self.table_name,
+                Item={"GameID": {"N": str(game_id)}, "State": {"S": json.dumps(state)}}
+            )
+
+
+class LocalStateStore:
+    """Local stand-in for the DynamoDB table: a JSON file mapping GameID to state."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return {int(game_id): state for game_id, state in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+
+    def load(self, game_ids):
+        stored = self._read()
+        return {game_id: stored[game_id] for game_id in game_ids if game_id in stored}
+
+    def save(self, states):
+        stored = self._read()
+        stored.update(states)
+        with open(self.path, "w") as f:
+            json.dump(stored, f)
+
+
+def get_state_store():
+    if STATE_TABLE:
+        return DynamoDBStateStore(STATE_TABLE)
+    return LocalStateStore(STATE_FILE)
+
+
+def quarter_name(quarter):
+    return f"Q{quarter}" if str(quarter).isdigit() else quarter
+
+
+def detect_change(previous, game):
+    """
+    Compare a game with its last-seen state.
+    Returns (label, state): label names the transition to publish (tip-off, end of a quarter,
+    final, or a score change past SCORE_CHANGE_THRESHOLD) or is None; state is what to store.
+    """
+    current = {
+        "status": game.get("Status"),
+        "quarter": game.get("Quarter"),
+        "away_score": game.get("AwayTeamScore") or 0,
+        "home_score": game.get("HomeTeamScore") or 0
+    }
+    if previous is None:
+        # Nothing has been announced for a game we have not seen before
+        previous = {"status": "Scheduled", "quarter": None, "away_score": 0, "home_score": 0}
+
+    label = None
+    if current["status"] in FINAL_STATUSES and previous["status"] not in FINAL_STATUSES:
+        label = "Final"
+    elif current["status"] == "InProgress":
+        if previous["status"] != "InProgress":
+            label = "Tip-off"
+        elif current["quarter"] != previous["quarter"] and previous["quarter"] not in (None, "Half"):
+            label = f"End of {quarter_name(previous['quarter'])}"
+        else:
+            points = (current["away_score"] + current["home_score"]
+                      - previous["away_score"] - previous["home_score"])
+            if points >= SCORE_CHANGE_THRESHOLD:
+                label = "Score update"
+
+    if label is None:
+        # Keep the last announced score so small changes add up toward the threshold
+        current["away_score"] = previous["away_score"]
+        current["home_score"] = previous["home_score"]
+    return label, current
+
+
+def load_http_cache(date):
+    try:
+        with open(HTTP_CACHE_FILE) as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return cache if cache.get("date") == date else {}
+
+
+def save_http_cache(validators):
+    with open(HTTP_CACHE_FILE, "w") as f:
+        json.dump(validators, f)
+
+
+def fetch_games(url, date):
+    """
+    Conditional GET of GamesByDate for date.
+    Returns (games, validators): games is None when the payload has not changed since the
+    last processed run; validators are saved with save_http_cache once this run is done.
+    When unchanged, validators keep the "game_ids" saved with them, if any.
+    """
+    cached = load_http_cache(date)
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = http.request("GET", url, headers=headers)
+    if response.status == 304:
+        return None, cached
+    if response.status != 200:
+        raise Exception(f"HTTP {response.status}")
+
+    validators = {
+        "date": date,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": hashlib.sha256(response.data).hexdigest()
+    }
+    # Some responses carry no validators; an identical body is just as unchanged
+    if validators["sha256"] == cached.get("sha256"):
+        return None, dict(validators, game_ids=cached.get("game_ids", []))
+    return json.loads(response.data.decode()), validators
+
+
+def build_team_messages(label, game, message, subject):
+    """One message per team in the game, with "team" and "event" message attributes"""
+    entries = []
+    for team in (game.get("AwayTeam"), game.get("HomeTeam")):
+        if not team:
+            continue
+        entries.append({
+            "game_id": game["GameID"],
+            "Subject": f"{subject}: {team} {label}",
+            "Message": f"{label}\n{message}",
+            "MessageAttributes": {
+                "team": {"DataType": "String", "StringValue": team},
+                "event": {"DataType": "String", "StringValue": label}
+            }
+        })
+    return entries
+
+
+def publish_batches(sns_client, topic_arn, entries):
+    """
+    Publish entries with PublishBatch, PUBLISH_CONCURRENCY batches at a time.
+    Returns the entries that were not published.
+    """
+    batches = [entries[i:i + PUBLISH_BATCH_SIZE] for i in range(0, len(entries), PUBLISH_BATCH_SIZE)]
+
+    def send(batch):
+        request = [
+            {
+                "Id": str(index),
+                "Subject": entry["Subject"],
+                "Message": entry["Message"],
+                "MessageAttributes": entry["MessageAttributes"]
+            }
+            for index, entry in enumerate(batch)
+        ]
+        try:
+            response = sns_client.publish_batch(TopicArn=topic_arn, PublishBatchRequestEntries=request)
+        except Exception as e:
+            print(f"Error publishing batch to SNS: {e}")
+            return batch
+        failed = response.get("Failed", [])
+        for failure in failed:
+            print(f"SNS rejected message {failure['Id']}: {failure.get('Code')} {failure.get('Message')}")
+        return [batch[int(failure["Id"])] for failure in failed]
+
+    failed_entries = []
+    with ThreadPoolExecutor(max_workers=max(1, min(PUBLISH_CONCURRENCY, len(batches)))) as executor:
+        for failed in executor.map(send, batches):
+            failed_entries.extend(failed)
+    return failed_entries
+
+
+def process_games(games, store, sns_client, topic_arn, format_message, subject):
+    """
+    Publish the meaningful changes in 'games' since the last run and save their new state.
+    format_message(game) builds the message body; subject prefixes each message subject.
+    Messages that SNS did not take are kept in the game's state under "pending" and only
+    those are sent again on the next run, so the other team is not notified twice.
+    Returns (number of messages sent, number of messages that failed).
+    """
+    previous_states = store.load(game["GameID"] for game in games)
+    entries = []
+    new_states = {}
+    for game in games:
+        game_id = game["GameID"]
+        previous = previous_states.get(game_id)
+        # Retry what failed last time first, so each team still gets its updates in order
+        for entry in (previous or {}).get("pending", []):
+            entries.append(dict(entry, game_id=game_id))
+        # Only publish games that changed in a meaningful way since the last run
+        label, state = detect_change(previous, game)
+        if label:
+            entries.extend(build_team_messages(label, game, format_message(game), subject))
+        new_states[game_id] = state
+
+    failed_entries = []
+    if entries:
+        failed_entries = publish_batches(sns_client, topic_arn, entries)
+        print(f"Published {len(entries) - len(failed_entries)} of {len(entries)} team messages to SNS.")
+    else:
+        print("No game changes to publish.")
+
+    for entry in failed_entries:
+        pending = {key: value for key, value in entry.items() if key != "game_id"}
+        new_states[entry["game_id"]].setdefault("pending", []).append(pending)
+    store.save({
+        game_id: state for game_id, state in new_states.items()
+        if state != previous_states.get(game_id)
+    })
+    return len(entries) - len(failed_entries), len(failed_entries)
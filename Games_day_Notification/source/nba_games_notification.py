@@ -1,9 +1,10 @@
-import urllib.request
 import os
 from _datetime import datetime, timedelta, timezone
-import boto3
 import json
 
+# nba_common.py sits next to this file; add both to the Lambda (see the README)
+from nba_common import LOG_LEVEL, get_client, get_state_store, fetch_games, save_http_cache, process_games
+
 def lambda_handler(event, context):
     sport_data_api_key = os.getenv("SPORTS_DATA_API_KEY")
     sns_arn = os.getenv("SNS_TOPIC_ARN")
@@ -19,12 +20,15 @@ def lambda_handler(event, context):
             print(f"Fetching game data for {today_date}")
 
             url = f"https://api.sportsdata.io/v3/nba/scores/json/GamesByDate/{today_date}?key={sport_data_api_key}"
-            with urllib.request.urlopen(url) as response:
-                data = json.loads(response.read().decode())
-            return data
+            data, validators = fetch_games(url, today_date)
+            if data is None:
+                print("Game data unchanged since the last run.")
+            elif LOG_LEVEL == "DEBUG":
+                print(json.dumps(data, indent=4))
+            return data, validators
         except Exception as e:
             print(f'Error while fetching game data: {e}')
-            return None
+            return None, None
 
     # format the game data
     def format_game_data(data):
@@ -62,27 +66,14 @@ def lambda_handler(event, context):
         else:
             return base_message + "Details are unavailable at the moment.\n"
 
-    # publish to sns topic
-    def publish_to_sns(message):
-        """Publish the message to SNS topic"""
-        sns_client = boto3.client(
-            'sns',
-            region_name=os.getenv('AWS_DEFAULT_REGION') or 'us-east-1',
-        )
-        try:
-            response = sns_client.publish(
-                TopicArn=sns_arn,
-                Message=message,
-                Subject="NBA Game Day Notification"
-            )
-
-            print("Published message to SNS topic successfully.")
-        except Exception as e:
-            print(f"Error while publishing to SNS: {e}")
-
     # main function
-    game_data = get_game_data()
-    messages = [format_game_data(game) for game in game_data]
-    final_message = "\n---\n".join(messages) if messages else "No games available for today."
-
-    publish_to_sns(final_message)
\ No newline at end of file
+    game_data, validators = get_game_data()
+    if game_data is None:
+        return
+
+    store = get_state_store()
+    sns_client = get_client('sns', region_name=os.getenv('AWS_DEFAULT_REGION') or 'us-east-1')
+    _, failed = process_games(game_data, store, sns_client, sns_arn, format_game_data,
+                              "NBA Game Day Notification")
+    if not failed:
+        save_http_cache(validators)
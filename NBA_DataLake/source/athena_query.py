@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+# Athena reuses a previous execution's results for identical SQL up to this many minutes old
+RESULT_REUSE_MINUTES = int(os.getenv("ATHENA_RESULT_REUSE_MINUTES", "60"))
+# Local cache of query results, keyed on the SQL and, when the query names its partitions,
+# the data files under them. Without partitions an entry is only reused until CACHE_TTL.
+CACHE_DIR = os.getenv("ATHENA_CACHE_DIR", ".athena_cache")
+CACHE_TTL = int(os.getenv("ATHENA_CACHE_TTL", "3600"))  # Seconds
+# Polling starts fast and backs off, since most queries finish within a few seconds
+POLL_INITIAL = 0.2
+POLL_MAX = 5.0
+POLL_MULTIPLIER = 1.5
+
+# Athena result types converted from their string values; anything else stays a string
+INT_TYPES = {"tinyint", "smallint", "integer", "bigint"}
+FLOAT_TYPES = {"float", "real", "double", "decimal"}
+
+
+class AthenaQueryError(Exception):
+    """The query finished in a FAILED or CANCELLED state."""
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and case outside string literals, so trivially different SQL shares a cache entry"""
+    parts = re.split(r"('(?:[^']|'')*')", sql.strip().rstrip(";"))
+    return "".join(
+        part if part.startswith("'") else re.sub(r"\s+", " ", part).lower()
+        for part in parts
+    ).strip()
+
+
+def convert_value(value, column_type):
+    if value is None:
+        return None
+    if column_type in INT_TYPES:
+        return int(value)
+    if column_type in FLOAT_TYPES:
+        return float(value)
+    if column_type == "boolean":
+        return value == "true"
+    return value
+
+
+class AthenaQueryRunner:
+    def __init__(self, athena_client, s3_client, bucket_name, database_name, data_prefix,
+                 partition_keys=(), workgroup="nba_analytics_workgroup", cache_dir=CACHE_DIR):
+        """
+        Run queries against the data lake's Glue database
+        :param data_prefix: S3 prefix the partitioned table's files live under
+        :param partition_keys: partition key names, in the order they appear in S3 keys
+        """
+        self.athena_client = athena_client
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.database_name = database_name
+        self.data_prefix = data_prefix
+        self.partition_keys = [key["Name"] if isinstance(key, dict) else key for key in partition_keys]
+        self.workgroup = workgroup
+        self.cache_dir = cache_dir
+
+    def start_query(self, sql):
+        """Start the query and return its execution ID"""
+        response = self.athena_client.start_query_execution(
+            QueryString=sql,
+            QueryExecutionContext={"Database": self.database_name},
+            WorkGroup=self.workgroup,
+            ResultReuseConfiguration={
+                "ResultReuseByAgeConfiguration": {
+                    "Enabled": RESULT_REUSE_MINUTES > 0,
+                    "MaxAgeInMinutes": max(RESULT_REUSE_MINUTES, 1)
+                }
+            }
+        )
+        return response["QueryExecutionId"]
+
+    def wait_for_query(self, execution_id):
+        """Poll until the query finishes, backing off between polls. Returns the QueryExecution."""
+        delay = POLL_INITIAL
+        while True:
+            execution = self.athena_client.get_query_execution(QueryExecutionId=execution_id)["QueryExecution"]
+            state = execution["Status"]["State"]
+            if state == "SUCCEEDED":
+                statistics = execution.get("Statistics", {})
+                reused = statistics.get("ResultReuseInformation", {}).get("ReusedPreviousResult", False)
+                print(f"Query {execution_id} succeeded: {statistics.get('DataScannedInBytes', 0)} bytes scanned"
+                      f"{' (reused previous result)' if reused else ''}")
+                return execution
+            if state in ("FAILED", "CANCELLED"):
+                reason = execution["Status"].get("StateChangeReason", state)
+                raise AthenaQueryError(f"Query {execution_id} {state.lower()}: {reason}")
+            time.sleep(delay)
+            delay = min(delay * POLL_MULTIPLIER, POLL_MAX)
+
+    def iter_rows(self, execution_id, statement_type="DML"):
+        """Stream the rows of a finished query as dicts, one results page at a time"""
+        paginator = self.athena_client.get_paginator("get_query_results")
+        columns = None
+        for page in paginator.paginate(QueryExecutionId=execution_id, PaginationConfig={"PageSize": 1000}):
+            rows = page["ResultSet"]["Rows"]
+            if columns is None:
+                columns = [
+                    (column["Name"], column["Type"].lower())
+                    for column in page["ResultSet"]["ResultSetMetadata"]["ColumnInfo"]
+                ]
+                # SELECT results repeat the column names as their first row
+                if statement_type == "DML":
+                    rows = rows[1:]
+            for row in rows:
+                values = [datum.get("VarCharValue") for datum in row["Data"]]
+                yield {name: convert_value(value, column_type) for (name, column_type), value in zip(columns, values)}
+
+    def partition_prefix(self, partition):
+        """S3 prefix for a partition dict such as {"snapshot_date": "2025-01-10"}; later keys may be left out"""
+        prefix = self.data_prefix
+        for key in self.partition_keys:
+            if key not in partition:
+                break
+            prefix += f"{key}={partition[key]}/"
+        return prefix
+
+    def data_version(self, partitions):
+        """Fingerprint of the files under the given partitions; one S3 listing per partition"""
+        digest = hashlib.sha256()
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for prefix in sorted({self.partition_prefix(partition) for partition in partitions}):
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for obj in page.get("Contents", []):
+                    digest.update(f"{obj['Key']}:{obj['ETag']}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def check_partitions(self, sql, partitions):
+        """Warn about partition keys the SQL never mentions: their files may not be what the query reads"""
+        normalized = normalize_sql(sql)
+        missing = sorted({key for partition in partitions for key in partition if key.lower() not in normalized})
+        if missing:
+            print(f"Warning: the query does not filter on {', '.join(missing)}; "
+                  f"its cached result may outlive changes to the data it reads")
+
+    def fingerprint(self, sql, partitions=None):
+        """
+        Cache key for a query. With partitions, it changes whenever their files change;
+        without, it only covers the SQL, so the entry lives until CACHE_TTL rather than
+        listing every object in the data lake on each call.
+        """
+        version = None
+        if partitions:
+            self.check_partitions(sql, partitions)
+            version = self.data_version(partitions)
+        key = json.dumps([normalize_sql(sql), self.database_name, version])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _cache_path(self, fingerprint):
+        return os.path.join(self.cache_dir, f"{fingerprint}.json")
+
+    def _read_cache(self, fingerprint):
+        try:
+            with open(self._cache_path(fingerprint)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry["stored_at"] > CACHE_TTL:
+            return None
+        return entry["rows"]
+
+    def _write_cache(self, fingerprint, rows):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(fingerprint)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"stored_at": time.time(), "rows": rows}, f)
+        os.replace(f"{path}.tmp", path)
+
+    def query(self, sql, partitions=None, use_cache=True):
+        """
+        Run a query and return its rows as a list of dicts
+        :param partitions: partition dicts the query reads, e.g. [{"snapshot_date": "2025-01-10"}]; the cached result
+                           is reused until the files under them change or CACHE_TTL passes. Without them
+                           the cached result is reused until CACHE_TTL, whatever changed in S3
+        """
+        fingerprint = self.fingerprint(sql, partitions) if use_cache else None
+        if fingerprint:
+            rows = self._read_cache(fingerprint)
+            if rows is not None:
+                print("Query served from local cache")
+                return rows
+
+        execution_id = self.start_query(sql)
+        execution = self.wait_for_query(execution_id)
+        rows = list(self.iter_rows(execution_id, execution.get("StatementType", "DML")))
+        if fingerprint and execution.get("StatementType", "DML") == "DML":
+            self._write_cache(fingerprint, rows)
+        return rows
+
+    def query_dataframe(self, sql, partitions=None, use_cache=True):
+        """Same as query(), as a pandas DataFrame"""
+        import pandas as pd  # Only needed for DataFrame results
+
+        return pd.DataFrame(self.query(sql, partitions, use_cache))
+
+
+def main():
+    from mysetup_resources import NBADataLakeSetup
+
+    if len(sys.argv) != 2:
+        print('Usage: python source/athena_query.py "SELECT ... FROM nba_players"')
+        sys.exit(1)
+    for row in NBADataLakeSetup().query(sys.argv[1]):
+        print(json.dumps(row))
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,18 @@
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, ALL_COMPLETED, wait
 import boto3
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Concurrent delete_objects calls (each deletes up to 1000 keys) while listing continues
+CLEANUP_WORKERS = int(os.getenv('CLEANUP_WORKERS', '8'))
+DELETE_BATCH_SIZE = 1000  # delete_objects limit
+GLUE_BATCH_SIZE = 100  # batch_delete_table limit
+PROGRESS_INTERVAL = 5  # Seconds between progress lines
+
 class NBADataLakeCleanup:
     def __init__(self, region=None):
         """
@@ -24,18 +31,68 @@ class NBADataLakeCleanup:
         self.glue_client = boto3.client('glue', region_name=self.region)
         self.athena_client = boto3.client('athena', region_name=self.region)
 
+    def _delete_batch(self, objects):
+        """Delete one batch of object versions; returns (deleted, failed) counts"""
+        response = self.s3_client.delete_objects(
+            Bucket=self.bucket_name,
+            Delete={'Objects': objects, 'Quiet': True}
+        )
+        errors = response.get('Errors', [])
+        for error in errors[:3]:
+            print(f"Failed to delete {error['Key']}: {error['Message']}")
+        return len(objects) - len(errors), len(errors)
+
+    def delete_objects(self, prefix="", label="objects"):
+        """
+        Delete every object version and delete marker under prefix.
+        Listing keeps going while up to CLEANUP_WORKERS batches of 1000 keys are being deleted.
+        Returns the number of versions deleted.
+        """
+        started = last_report = time.monotonic()
+        deleted = failed = 0
+        in_flight = set()
+
+        def collect(return_when):
+            nonlocal deleted, failed, last_report
+            done, _ = wait(in_flight, return_when=return_when)
+            for future in done:
+                in_flight.discard(future)
+                batch_deleted, batch_failed = future.result()
+                deleted += batch_deleted
+                failed += batch_failed
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL:
+                print(f"Deleted {deleted} {label} so far ({deleted / (now - started):.0f}/s)")
+                last_report = now
+
+        # Versions and delete markers too, so versioned buckets end up empty; unversioned objects list as version "null"
+        paginator = self.s3_client.get_paginator('list_object_versions')
+        batch = []
+        with ThreadPoolExecutor(max_workers=CLEANUP_WORKERS) as executor:
+            for result in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for version in result.get('Versions', []) + result.get('DeleteMarkers', []):
+                    batch.append({'Key': version['Key'], 'VersionId': version['VersionId']})
+                    if len(batch) == DELETE_BATCH_SIZE:
+                        if len(in_flight) >= CLEANUP_WORKERS:
+                            collect(FIRST_COMPLETED)
+                        in_flight.add(executor.submit(self._delete_batch, batch))
+                        batch = []
+            if batch:
+                in_flight.add(executor.submit(self._delete_batch, batch))
+            if in_flight:
+                collect(ALL_COMPLETED)
+
+        if failed:
+            print(f"{failed} {label} could not be deleted")
+        elapsed = time.monotonic() - started
+        print(f"Deleted {deleted} {label} from bucket {self.bucket_name} in {elapsed:.1f}s "
+              f"({deleted / max(elapsed, 0.001):.0f}/s)")
+        return deleted
+
     def delete_bucket_contents(self):
         """Delete all objects in the S3 bucket"""
         try:
-            paginator = self.s3_client.get_paginator('list_objects_v2')
-            for result in paginator.paginate(Bucket=self.bucket_name):
-                if 'Contents' in result:
-                    objects = [{'Key': obj['Key']} for obj in result['Contents']]
-                    self.s3_client.delete_objects(
-                        Bucket=self.bucket_name,
-                        Delete={'Objects': objects}
-                    )
-                    print(f"Deleted {len(objects)} objects from bucket {self.bucket_name}")
+            self.delete_objects()
         except ClientError as e:
             print(f"Error deleting bucket contents: {e}")
 
@@ -54,13 +111,20 @@ class NBADataLakeCleanup:
     def delete_glue_database(self):
         """Delete Glue database and its tables"""
         try:
-            tables = self.glue_client.get_tables(DatabaseName=self.database_name)['TableList']
-            for table in tables:
-                self.glue_client.delete_table(
-                    DatabaseName=self.database_name, 
-                    Name=table['Name']
+            names = []
+            paginator = self.glue_client.get_paginator('get_tables')
+            for result in paginator.paginate(DatabaseName=self.database_name):
+                names.extend(table['Name'] for table in result['TableList'])
+
+            for start in range(0, len(names), GLUE_BATCH_SIZE):
+                batch = names[start:start + GLUE_BATCH_SIZE]
+                response = self.glue_client.batch_delete_table(
+                    DatabaseName=self.database_name,
+                    TablesToDelete=batch
                 )
-                print(f"Deleted table: {table['Name']}")
+                for error in response.get('Errors', []):
+                    print(f"Error deleting table {error['TableName']}: {error['ErrorDetail']['ErrorMessage']}")
+                print(f"Deleted {len(batch) - len(response.get('Errors', []))} tables")
 
             self.glue_client.delete_database(Name=self.database_name)
             print(f"Database {self.database_name} deleted successfully.")
@@ -72,18 +136,7 @@ class NBADataLakeCleanup:
     def delete_athena_query_results(self):
         """Delete Athena query results from S3"""
         try:
-            paginator = self.s3_client.get_paginator('list_objects_v2')
-            for result in paginator.paginate(
-                Bucket=self.bucket_name, 
-                Prefix="athena-query-results/"
-            ):
-                if 'Contents' in result:
-                    objects = [{'Key': obj['Key']} for obj in result['Contents']]
-                    self.s3_client.delete_objects(
-                        Bucket=self.bucket_name,
-                        Delete={'Objects': objects}
-                    )
-                    print(f"Deleted {len(objects)} Athena query results")
+            self.delete_objects(prefix="athena-query-results/", label="Athena query results")
         except ClientError as e:
             print(f"Error deleting Athena query results: {e}")
 
@@ -0,0 +1,28 @@
+import hashlib
+import json
+
+
+def record_hash(record, columns):
+    """Hash of the stored columns of a record, so changes to fields we don't keep are ignored"""
+    values = {column["Name"]: record.get(column["Name"]) for column in columns}
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def diff_records(records, previous_hashes, columns, key="PlayerID"):
+    """
+    Compare a full fetch against the hashes from the last ingestion.
+    Returns (new or changed records, keys no longer in the fetch, hashes of the fetch).
+    Keys are strings, as they come back from the JSON state file.
+    """
+    current_hashes = {}
+    changed = []
+    for record in records:
+        record_key = str(record.get(key))
+        digest = record_hash(record, columns)
+        if record_key in current_hashes:
+            continue  # Duplicate in the API response; the first one wins
+        current_hashes[record_key] = digest
+        if previous_hashes.get(record_key) != digest:
+            changed.append(record)
+    removed = [record_key for record_key in previous_hashes if record_key not in current_hashes]
+    return changed, removed, current_hashes
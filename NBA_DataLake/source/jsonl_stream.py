@@ -0,0 +1,32 @@
+import json
+import os
+import zlib
+
+import ijson
+from ijson import JSONError  # Raised for malformed or truncated responses
+
+# Size of each multipart upload part (s3_multipart.py raises it to S3's 5 MiB minimum)
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_array(response):
+    """
+    Yield the items of a top-level JSON array from a streamed requests response,
+    parsing the body as it arrives instead of loading it whole
+    """
+    response.raw.decode_content = True  # Undo any gzip Content-Encoding before parsing
+    return ijson.items(response.raw, "item", use_float=True, buf_size=READ_CHUNK_SIZE)
+
+
+def jsonl_chunks(records, compress=False):
+    """Serialize records as newline-delimited JSON bytes, gzip-compressed as they go if 'compress'"""
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 writes a gzip header
+    for record in records:
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        if compressor:
+            line = compressor.compress(line)
+        if line:
+            yield line
+    if compressor:
+        yield compressor.flush()
@@ -1,14 +1,72 @@
 import boto3
+import itertools
 import json
 import time
+from datetime import datetime, timezone
 import requests
+import urllib3
 from dotenv import load_dotenv
 import os
 from botocore.exceptions import ClientError
 
+from athena_query import AthenaQueryError, AthenaQueryRunner
+from http_client import get_session
+from incremental import diff_records
+from s3_multipart import stream_to_s3
+
 # Load environment variables
 load_dotenv()
 
+# Schema of the nba_players table; the Parquet writer uses the same column types
+PLAYER_COLUMNS = [
+    {"Name": "PlayerID", "Type": "int"},
+    {"Name": "FirstName", "Type": "string"},
+    {"Name": "LastName", "Type": "string"},
+    {"Name": "Team", "Type": "string"},
+    {"Name": "Position", "Type": "string"},
+    {"Name": "Points", "Type": "int"}
+]
+
+# Incremental mode: every row also records when it was ingested and whether the player was removed
+CURRENT_COLUMNS = PLAYER_COLUMNS + [
+    {"Name": "ingested_at", "Type": "bigint"},
+    {"Name": "is_deleted", "Type": "boolean"}
+]
+# High-water mark and per-PlayerID hashes of the last incremental ingestion
+INGESTION_STATE_KEY = "state/nba_players_ingestion.json"
+
+# Hive-style partitions: s3://bucket/<prefix>snapshot_date=2025-01-10/<file>
+# Only the date is a partition: projecting a season key as well would multiply the partitions
+# Athena enumerates for every query without a partition filter
+PARTITION_KEYS = [
+    {"Name": "snapshot_date", "Type": "string"}
+]
+
+# Storage used by each DATA_FORMAT: S3 prefix and the Glue table's input/output formats and SerDe
+STORAGE_FORMATS = {
+    "parquet": {
+        "prefix": "processed-data/nba_players/",
+        "current_prefix": "processed-data/nba_players_current/",
+        "InputFormat": "org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat",
+        "OutputFormat": "org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat",
+        "SerdeInfo": {
+            "SerializationLibrary": "org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe",
+            "Parameters": {"serialization.format": "1"}
+        },
+        "Parameters": {"classification": "parquet", "parquet.compression": "SNAPPY"}
+    },
+    "json": {
+        "prefix": "raw-data/",
+        "current_prefix": "raw-data/nba_players_current/",
+        "InputFormat": "org.apache.hadoop.mapred.TextInputFormat",
+        "OutputFormat": "org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
+        "SerdeInfo": {
+            "SerializationLibrary": "org.openx.data.jsonserde.JsonSerDe"
+        },
+        "Parameters": {"classification": "json"}
+    }
+}
+
 class NBADataLakeSetup:
     def __init__(self, region="us-east-1"):
         """
@@ -23,6 +81,22 @@ class NBADataLakeSetup:
         self.database_name = os.getenv('GLUE_DATABASE_NAME', 'glue_nba_datalake')
         self.athena_output_location = f"s3://{self.bucket_name}/athena-query-results/"
 
+        # "parquet" (typed, snappy-compressed columns) or "json" (line-delimited JSON)
+        self.data_format = os.getenv('DATA_FORMAT', 'parquet').lower()
+        if self.data_format not in STORAGE_FORMATS:
+            raise ValueError(f"Unknown DATA_FORMAT: {self.data_format}")
+        self.storage = STORAGE_FORMATS[self.data_format]
+
+        # "full" uploads a whole snapshot per run; "incremental" uploads only changed players
+        self.ingestion_mode = os.getenv('INGESTION_MODE', 'full').lower()
+        # Incremental runs between compactions of the delta files
+        self.compact_after = int(os.getenv('COMPACT_AFTER_DELTAS', '24'))
+        # Stream the API response straight into S3 as JSONL (optionally gzipped) without loading it
+        self.stream_ingestion = os.getenv('STREAM_INGESTION', 'false').lower() == 'true'
+        self.gzip_jsonl = os.getenv('GZIP_JSONL', 'false').lower() == 'true'
+        if self.stream_ingestion and (self.data_format != "json" or self.ingestion_mode != "full"):
+            raise ValueError("STREAM_INGESTION needs DATA_FORMAT=json and INGESTION_MODE=full")
+
         # AWS Clients
         self.s3_client = boto3.client("s3", region_name=self.region)
         self.glue_client = boto3.client("glue", region_name=self.region)
@@ -32,6 +106,11 @@ class NBADataLakeSetup:
         self.api_key = os.getenv("SPORTS_DATA_API_KEY")
         self.nba_endpoint = os.getenv("NBA_ENDPOINT")
 
+        self.query_runner = AthenaQueryRunner(
+            self.athena_client, self.s3_client, self.bucket_name, self.database_name,
+            self.storage["prefix"], PARTITION_KEYS
+        )
+
     def create_s3_bucket(self):
         """Create S3 bucket with error handling and region-specific configuration"""
         try:
@@ -66,7 +145,7 @@ class NBADataLakeSetup:
         """Fetch NBA data with robust error handling and validation"""
         try:
             headers = {"Ocp-Apim-Subscription-Key": self.api_key}
-            response = requests.get(self.nba_endpoint, headers=headers)
+            response = get_session().get(self.nba_endpoint, headers=headers)
             response.raise_for_status()
             data = response.json()
             
@@ -79,55 +158,225 @@ class NBADataLakeSetup:
             print(f"Error fetching NBA data: {e}")
             return []
 
+    def stream_nba_data_to_s3(self):
+        """
+        Parse the NBA response as it downloads and write each record as a JSONL line into a
+        multipart S3 upload, so memory stays flat however large the response is.
+        Returns the number of records uploaded.
+        """
+        from jsonl_stream import JSONError, UPLOAD_PART_SIZE, iter_json_array, jsonl_chunks  # Needs ijson
+
+        snapshot = datetime.now(timezone.utc)
+        extension = "jsonl.gz" if self.gzip_jsonl else "jsonl"
+        file_key = f"{self.partition_prefix(snapshot)}nba_player_data_{int(snapshot.timestamp())}.{extension}"
+        headers = {"Ocp-Apim-Subscription-Key": self.api_key}
+        count = 0
+
+        def counted(records):
+            nonlocal count
+            for record in records:
+                count += 1
+                yield record
+
+        try:
+            with get_session().get(self.nba_endpoint, headers=headers, stream=True) as response:
+                response.raise_for_status()
+                records = iter_json_array(response)
+                first = next(records, None)
+                if first is None:
+                    raise ValueError("Invalid or empty NBA data received")
+
+                object_args = {"ContentType": "application/x-ndjson"}
+                if self.gzip_jsonl:
+                    object_args["ContentEncoding"] = "gzip"
+                chunks = jsonl_chunks(counted(itertools.chain([first], records)), compress=self.gzip_jsonl)
+                size = stream_to_s3(self.s3_client, chunks, self.bucket_name, file_key,
+                                    part_size=UPLOAD_PART_SIZE, **object_args)
+            print(f"Streamed {count} records ({size} bytes) to S3: {file_key}")
+            return count
+        # Reads from response.raw fail mid-stream with urllib3 errors, not requests ones
+        except (requests.RequestException, urllib3.exceptions.HTTPError, ValueError, JSONError, ClientError) as e:
+            print(f"Error streaming NBA data to S3: {e}")
+            return 0
+
+    def serialize_data(self, data, columns=PLAYER_COLUMNS):
+        """Serialize the records for DATA_FORMAT, returning (file extension, body bytes)"""
+        if self.data_format == "parquet":
+            from parquet_writer import records_to_parquet  # Needs pyarrow
+
+            return "parquet", records_to_parquet(data, columns)
+
+        line_delimited_data = "\n".join([json.dumps(record) for record in data])
+        return "jsonl", line_delimited_data.encode('utf-8')
+
+    def partition_prefix(self, snapshot):
+        """S3 prefix of the partition a snapshot taken at 'snapshot' (UTC datetime) belongs to"""
+        return f"{self.storage['prefix']}snapshot_date={snapshot.strftime('%Y-%m-%d')}/"
+
     def upload_data_to_s3(self, data):
-        """Upload data to S3 with line-delimited JSON"""
+        """Upload data to S3 as Parquet or line-delimited JSON"""
         if not data:
             print("No data to upload.")
             return
 
-        line_delimited_data = "\n".join([json.dumps(record) for record in data])
-        file_key = f"raw-data/nba_player_data_{int(time.time())}.jsonl"
+        extension, body = self.serialize_data(data)
+        snapshot = datetime.now(timezone.utc)
+        file_key = f"{self.partition_prefix(snapshot)}nba_player_data_{int(snapshot.timestamp())}.{extension}"
 
         try:
             self.s3_client.put_object(
                 Bucket=self.bucket_name,
                 Key=file_key,
-                Body=line_delimited_data.encode('utf-8')
+                Body=body
             )
             print(f"Uploaded data to S3: {file_key}")
         except ClientError as e:
             print(f"S3 upload error: {e}")
 
-    def create_glue_table(self):
-        """Create Glue table with flexible schema"""
+    def load_ingestion_state(self):
+        """Read the state left by the last incremental run (empty on the first run)"""
         try:
-            self.glue_client.create_table(
-                DatabaseName=self.database_name,
-                TableInput={
-                    "Name": "nba_players",
-                    "StorageDescriptor": {
-                        "Columns": [
-                            {"Name": "PlayerID", "Type": "int"},
-                            {"Name": "FirstName", "Type": "string"},
-                            {"Name": "LastName", "Type": "string"},
-                            {"Name": "Team", "Type": "string"},
-                            {"Name": "Position", "Type": "string"},
-                            {"Name": "Points", "Type": "int"}
-                        ],
-                        "Location": f"s3://{self.bucket_name}/raw-data/",
-                        "InputFormat": "org.apache.hadoop.mapred.TextInputFormat",
-                        "OutputFormat": "org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
-                        "SerdeInfo": {
-                            "SerializationLibrary": "org.openx.data.jsonserde.JsonSerDe"
-                        },
-                    },
-                    "TableType": "EXTERNAL_TABLE",
-                },
-            )
-            print(f"Glue table 'nba_players' created successfully.")
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=INGESTION_STATE_KEY)
+            return json.loads(response["Body"].read())
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchKey':
+                return {"high_water_mark": 0, "deltas_since_compaction": 0, "hashes": {}}
+            raise
+
+    def save_ingestion_state(self, state):
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=INGESTION_STATE_KEY,
+            Body=json.dumps(state).encode('utf-8')
+        )
+
+    def put_current_file(self, kind, rows, ingested_at):
+        """Upload a base or delta file of the nba_players_current table and return its key"""
+        extension, body = self.serialize_data(rows, CURRENT_COLUMNS)
+        file_key = f"{self.storage['current_prefix']}{kind}_{ingested_at}.{extension}"
+        self.s3_client.put_object(Bucket=self.bucket_name, Key=file_key, Body=body)
+        return file_key
+
+    def compact(self, data, ingested_at):
+        """Replace the base and delta files with one deduplicated file of the current players"""
+        current, _, _ = diff_records(data, {}, PLAYER_COLUMNS)
+        rows = [dict(record, ingested_at=ingested_at, is_deleted=False) for record in current]
+        file_key = self.put_current_file("base", rows, ingested_at)
+
+        # The new base is written first, so queries never see an empty table
+        stale = []
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for result in paginator.paginate(Bucket=self.bucket_name, Prefix=self.storage['current_prefix']):
+            stale.extend({'Key': obj['Key']} for obj in result.get('Contents', []) if obj['Key'] != file_key)
+        for start in range(0, len(stale), 1000):
+            self.s3_client.delete_objects(Bucket=self.bucket_name, Delete={'Objects': stale[start:start + 1000]})
+        print(f"Compacted {len(stale)} files into {file_key}")
+
+    def ingest_incremental(self, data):
+        """
+        Upload only the players that are new, changed or gone since the last run as a delta file.
+        The first run, and every COMPACT_AFTER_DELTAS runs after it, writes a compacted base instead.
+        """
+        state = self.load_ingestion_state()
+        changed, removed, hashes = diff_records(data, state["hashes"], PLAYER_COLUMNS)
+        # Always past the high-water mark, so the latest row of a player wins even if clocks drift
+        ingested_at = max(int(time.time()), state["high_water_mark"] + 1)
+
+        if not state["hashes"] or state["deltas_since_compaction"] >= self.compact_after:
+            self.compact(data, ingested_at)
+            state["deltas_since_compaction"] = 0
+        elif changed or removed:
+            rows = [dict(record, ingested_at=ingested_at, is_deleted=False) for record in changed]
+            rows += [{"PlayerID": int(player_id), "ingested_at": ingested_at, "is_deleted": True} for player_id in removed]
+            file_key = self.put_current_file("delta", rows, ingested_at)
+            state["deltas_since_compaction"] += 1
+            print(f"Uploaded delta of {len(changed)} changed and {len(removed)} removed players: {file_key}")
+        else:
+            print("No player changes since the last ingestion.")
+            return
+
+        state.update(high_water_mark=ingested_at, hashes=hashes)
+        self.save_ingestion_state(state)
+
+    def partition_projection(self):
+        """
+        Glue table parameters that let Athena compute the partitions from the query's
+        WHERE clause instead of listing them, so no MSCK REPAIR or crawler is needed
+        """
+        location = f"s3://{self.bucket_name}/{self.storage['prefix']}"
+        return {
+            "projection.enabled": "true",
+            "projection.snapshot_date.type": "date",
+            "projection.snapshot_date.format": "yyyy-MM-dd",
+            "projection.snapshot_date.range": "2020-01-01,NOW",
+            "projection.snapshot_date.interval": "1",
+            "projection.snapshot_date.interval.unit": "DAYS",
+            "storage.location.template": f"{location}snapshot_date=${{snapshot_date}}/"
+        }
+
+    def save_glue_table(self, table_input):
+        """Create the Glue table, or update it if an earlier run already created it"""
+        name = table_input["Name"]
+        try:
+            self.glue_client.create_table(DatabaseName=self.database_name, TableInput=table_input)
+            print(f"Glue table '{name}' created successfully.")
+        except self.glue_client.exceptions.AlreadyExistsException:
+            # Bring a table created by an earlier version up to the current layout
+            self.glue_client.update_table(DatabaseName=self.database_name, TableInput=table_input)
+            print(f"Glue table '{name}' updated.")
         except ClientError as e:
             print(f"Glue table creation error: {e}")
 
+    def create_glue_table(self):
+        """Create (or update) the partitioned Glue table, using the SerDe for DATA_FORMAT"""
+        table_input = {
+            "Name": "nba_players",
+            "StorageDescriptor": {
+                "Columns": PLAYER_COLUMNS,
+                "Location": f"s3://{self.bucket_name}/{self.storage['prefix']}",
+                "InputFormat": self.storage["InputFormat"],
+                "OutputFormat": self.storage["OutputFormat"],
+                "SerdeInfo": self.storage["SerdeInfo"],
+            },
+            "PartitionKeys": PARTITION_KEYS,
+            "TableType": "EXTERNAL_TABLE",
+            "Parameters": {**self.storage["Parameters"], **self.partition_projection()},
+        }
+        self.save_glue_table(table_input)
+
+    def create_current_table(self):
+        """Create the table over the incremental base and delta files"""
+        self.save_glue_table({
+            "Name": "nba_players_current",
+            "StorageDescriptor": {
+                "Columns": CURRENT_COLUMNS,
+                "Location": f"s3://{self.bucket_name}/{self.storage['current_prefix']}",
+                "InputFormat": self.storage["InputFormat"],
+                "OutputFormat": self.storage["OutputFormat"],
+                "SerdeInfo": self.storage["SerdeInfo"],
+            },
+            "TableType": "EXTERNAL_TABLE",
+            "Parameters": self.storage["Parameters"],
+        })
+
+    def create_latest_view(self):
+        """Create the nba_players_latest view: the newest row of each player still in the feed"""
+        columns = ", ".join(column["Name"] for column in PLAYER_COLUMNS)
+        sql = f"""
+            CREATE OR REPLACE VIEW nba_players_latest AS
+            SELECT {columns}, ingested_at
+            FROM (
+                SELECT *, row_number() OVER (PARTITION BY PlayerID ORDER BY ingested_at DESC) AS row_num
+                FROM nba_players_current
+            )
+            WHERE row_num = 1 AND NOT is_deleted
+        """
+        try:
+            self.query(sql, use_cache=False)
+            print("Athena view 'nba_players_latest' created successfully.")
+        except (AthenaQueryError, ClientError) as e:
+            print(f"Athena view creation error: {e}")
+
     def configure_athena(self):
         """Configure Athena workgroup and output location"""
         try:
@@ -146,14 +395,35 @@ class NBADataLakeSetup:
             else:
                 print(f"Error configuring Athena: {e}")
 
+    def query(self, sql, partitions=None, use_cache=True):
+        """
+        Run an Athena query against the data lake and return its rows as dicts
+        :param partitions: partitions the query reads, e.g. [{"snapshot_date": "2025-01-10"}], used to key the local result cache;
+                           without them a cached result is reused until ATHENA_CACHE_TTL
+        """
+        return self.query_runner.query(sql, partitions, use_cache)
+
     def run(self):
         """Orchestrate the entire data lake setup process"""
         try:
             self.create_s3_bucket()
             self.create_glue_database()
+            if self.stream_ingestion:
+                if self.stream_nba_data_to_s3():
+                    self.create_glue_table()
+                    self.configure_athena()
+                else:
+                    print("Skipping table setup due to no data.")
+                return
+
             nba_data = self.fetch_nba_data()
             
-            if nba_data:
+            if nba_data and self.ingestion_mode == "incremental":
+                self.ingest_incremental(nba_data)
+                self.create_current_table()
+                self.configure_athena()
+                self.create_latest_view()
+            elif nba_data:
                 self.upload_data_to_s3(nba_data)
                 self.create_glue_table()
                 self.configure_athena()
@@ -0,0 +1,45 @@
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Arrow type written for each Glue column type, so Athena reads the file with the table's schema
+GLUE_TO_ARROW = {
+    "int": (pa.int32(), int),
+    "bigint": (pa.int64(), int),
+    "double": (pa.float64(), float),
+    "boolean": (pa.bool_(), bool),
+    "string": (pa.string(), str),
+}
+
+
+def _convert(value, python_type):
+    """Coerce an API value to the column's type; missing or unparseable values become null."""
+    if value is None:
+        return None
+    try:
+        return python_type(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_table(records, columns):
+    """
+    Build a typed Arrow table from the API records.
+    :param records: list of dicts as returned by the SportsData.io API
+    :param columns: Glue column definitions ({"Name": ..., "Type": ...})
+    """
+    fields, arrays = [], []
+    for column in columns:
+        arrow_type, python_type = GLUE_TO_ARROW[column["Type"]]
+        values = [_convert(record.get(column["Name"]), python_type) for record in records]
+        fields.append(pa.field(column["Name"], arrow_type))
+        arrays.append(pa.array(values, type=arrow_type))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def records_to_parquet(records, columns, compression="snappy"):
+    """Serialize the records to Parquet bytes with one typed column per Glue column"""
+    buffer = io.BytesIO()
+    pq.write_table(build_table(records, columns), buffer, compression=compression)
+    return buffer.getvalue()
@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor, ALL_COMPLETED, FIRST_COMPLETED, wait
+
+# This module is copied unchanged into every project that streams uploads to S3.
+# Part size and parallelism come from the caller, i.e. from that project's config.
+
+# S3 rejects multipart parts smaller than 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+
+def _upload_part(s3, bucket, key, upload_id, part_number, data):
+    response = s3.upload_part(
+        Bucket=bucket,
+        Key=key,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        Body=data
+    )
+    return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+
+def stream_to_s3(s3, chunks, bucket, key, part_size=DEFAULT_PART_SIZE, max_in_flight=1, **object_args):
+    """
+    Upload an iterable of byte chunks to S3 without holding the whole object in memory.
+    Chunks are regrouped into parts of part_size bytes and at most max_in_flight parts
+    are uploading at once. Up to max_in_flight + 1 parts are held in memory (the parts
+    uploading plus the one being filled), i.e. two parts with the default max_in_flight=1.
+    Objects smaller than one part are uploaded with a single put_object.
+    Extra keyword arguments (ContentType, ContentEncoding...) are passed to S3.
+    Returns the number of bytes uploaded.
+    """
+    part_size = max(part_size, MIN_PART_SIZE)
+    chunks = iter(chunks)
+    buffer = bytearray()
+
+    # Fill the first part; small objects never need a multipart upload
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) >= part_size:
+            break
+    if len(buffer) < part_size:
+        s3.put_object(Bucket=bucket, Key=key, Body=bytes(buffer), **object_args)
+        return len(buffer)
+
+    upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key, **object_args)["UploadId"]
+    parts = []
+    in_flight = set()
+    part_number = 0
+    total = 0
+
+    def collect(return_when):
+        done, _ = wait(in_flight, return_when=return_when)
+        for future in done:
+            in_flight.discard(future)
+            parts.append(future.result())
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as executor:
+            def submit(data):
+                nonlocal part_number, total
+                if len(in_flight) >= max_in_flight:
+                    collect(FIRST_COMPLETED)
+                part_number += 1
+                total += len(data)
+                in_flight.add(executor.submit(
+                    _upload_part, s3, bucket, key, upload_id, part_number, data
+                ))
+
+            while True:
+                while len(buffer) >= part_size:
+                    submit(bytes(buffer[:part_size]))
+                    del buffer[:part_size]
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                buffer += chunk
+            if buffer:
+                submit(bytes(buffer))
+            if in_flight:
+                collect(ALL_COMPLETED)
+
+        parts.sort(key=lambda part: part["PartNumber"])
+        s3.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts}
+        )
+        return total
+    except Exception:
+        s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        raise
@@ -11,15 +11,22 @@ from config import (
     AWS_REGION,               # AWS region where services are deployed (e.g., 'us-east-1')
     MEDIACONVERT_ENDPOINT,    # The endpoint URL for AWS MediaConvert service
     MEDIACONVERT_ROLE_ARN,    # The Amazon Resource Name (ARN) for the IAM role used by MediaConvert
-    S3_BUCKET_NAME            # The name of the Amazon S3 bucket used for input/output data
+    S3_BUCKET_NAME,           # The name of the Amazon S3 bucket used for input/output data
+    OUTPUT_KEY                # The S3 key (path) where process_1_video.py saves the video
 )
 
-def create_job():
+def create_job(input_key=OUTPUT_KEY):
     """
     Create a MediaConvert job to process a video.
     
     This function initializes the MediaConvert client, defines the job settings,
     and submits a job to AWS MediaConvert for processing a video file stored in S3.
+    
+    Args:
+        input_key (str, optional): The S3 key (path) of the video to process. Defaults to OUTPUT_KEY.
+    
+    Returns:
+        dict or None: The created MediaConvert job if successful; otherwise, None.
     """
     try:
         # Initialize the MediaConvert client with specified region and endpoint
@@ -30,7 +37,7 @@ def create_job():
         )
 
         # Define the S3 URL for the input video file to be processed
-        input_s3_url = f"s3://{S3_BUCKET_NAME}/videos/first_video.mp4"
+        input_s3_url = f"s3://{S3_BUCKET_NAME}/{input_key}"
 
         # Define the S3 URL where the processed videos will be saved
         output_s3_url = f"s3://{S3_BUCKET_NAME}/processed_videos/"
@@ -107,6 +114,9 @@ def create_job():
         # Pretty-print the JSON response from MediaConvert
         print(json.dumps(response, indent=4, default=str))
 
+        # Return the created job so the caller can track it
+        return response["Job"]
+
     except Exception as e:
         # Catch any exceptions that occur during job creation and print an error message
         print(f"Error creating MediaConvert job: {e}")
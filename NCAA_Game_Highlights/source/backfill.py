@@ -0,0 +1,160 @@
+# backfill.py
+
+# Import the 'threading' module for the lock shared by the rate limiter
+import threading
+
+# Import the 'time' module to measure elapsed time and to wait between API calls
+import time
+
+# Import the thread pool helpers used to fetch several date/league pairs at the same time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Import the 'date' and 'timedelta' classes to walk through the backfill date range
+from datetime import date, timedelta
+
+# Import specific configuration variables from the 'config.py' module
+from config import (
+    LIMIT,                         # The maximum number of highlights per API page
+    BACKFILL_START_DATE,           # The first date of the backfill range
+    BACKFILL_END_DATE,             # The last date of the backfill range (inclusive)
+    BACKFILL_LEAGUES,              # The comma-separated leagues to backfill
+    BACKFILL_CONCURRENCY,          # The number of date/league pairs fetched at once
+    BACKFILL_REQUESTS_PER_SECOND,  # The API call budget shared by all workers
+    BACKFILL_MAX_PAGES             # The most pages fetched for one date/league pair
+)
+
+# Import the single-page fetch and the S3 writer from 'fetch.py'
+from fetch import fetch_highlights, save_to_s3
+
+class RateLimiter:
+    """
+    Space API calls evenly so all workers together stay under 'rate' requests per second.
+    """
+    def __init__(self, rate):
+        # The minimum number of seconds between two API calls
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def acquire(self):
+        # Reserve the next free time slot, then sleep until it arrives
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def date_range(start_date, end_date):
+    """
+    Yield every YYYY-MM-DD date from 'start_date' to 'end_date', inclusive.
+    """
+    day = date.fromisoformat(start_date)
+    last = date.fromisoformat(end_date)
+    while day <= last:
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+def backfill_pair(day, league, limiter, limit=LIMIT, max_pages=BACKFILL_MAX_PAGES):
+    """
+    Page through the API's offset/limit results for one date and league,
+    saving each page to S3 as soon as it arrives.
+
+    Args:
+        day (str): The date (YYYY-MM-DD) to fetch highlights for.
+        league (str): The league to fetch highlights for.
+        limiter (RateLimiter): The rate limiter shared by all workers.
+        limit (int, optional): The page size. Defaults to LIMIT.
+        max_pages (int, optional): The most pages fetched. Defaults to BACKFILL_MAX_PAGES.
+
+    Returns:
+        int or None: The number of records saved, or None if a page failed or the pair
+        still had results after 'max_pages' pages (the pages saved before are kept).
+    """
+    offset = 0
+    previous = None
+    for page_number in range(max_pages):
+        # Wait for our turn in the shared API call budget
+        limiter.acquire()
+        page = fetch_highlights(date=day, league_name=league, limit=limit, offset=offset)
+        if page is None:
+            print(f"Page {page_number} of {league} {day} failed after {offset} records.")
+            return None
+        data = page.get("data", [])
+
+        # An API that ignores 'offset' sends the same page again, which is already saved
+        if data and data == previous:
+            print(f"Page {page_number} of {league} {day} repeats the previous page, stopping.")
+            return offset
+
+        # Save the page right away, one object per page so a rerun overwrites the same keys
+        if data:
+            save_to_s3(page, f"backfill/{league}/{day}/page_{page_number:04d}")
+        offset += len(data)
+        previous = data
+
+        # Stop on an empty or short page, or once the reported total has been reached
+        total = page.get("pagination", {}).get("totalCount")
+        if len(data) < limit or (total is not None and offset >= total):
+            return offset
+
+    # Give up on the pair rather than fetch (and save) pages without end
+    print(f"{league} {day} still had results after {max_pages} pages (BACKFILL_MAX_PAGES), stopping.")
+    return None
+
+def run_backfill(start_date=BACKFILL_START_DATE, end_date=BACKFILL_END_DATE,
+                 leagues=BACKFILL_LEAGUES, concurrency=BACKFILL_CONCURRENCY,
+                 requests_per_second=BACKFILL_REQUESTS_PER_SECOND):
+    """
+    Fetch highlights for every date x league pair and save them to S3.
+
+    The pairs are fetched concurrently under a shared rate limit, and each page is
+    written to S3 as soon as it arrives.
+
+    Returns:
+        dict: A summary with the record count and the pairs that failed.
+    """
+    # Accept either a list of leagues or a comma-separated string
+    if isinstance(leagues, str):
+        leagues = [league.strip() for league in leagues.split(",") if league.strip()]
+    pairs = [(day, league) for day in date_range(start_date, end_date) for league in leagues]
+    print(f"Backfilling {len(pairs)} date/league pairs from {start_date} to {end_date} "
+          f"for {', '.join(leagues)}...")
+
+    limiter = RateLimiter(requests_per_second)
+    summary = {"pairs": len(pairs), "records": 0, "failed": []}
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        # Submit every pair and remember which pair each future belongs to
+        futures = {
+            executor.submit(backfill_pair, day, league, limiter): (day, league)
+            for day, league in pairs
+        }
+
+        # Collect each pair's result as soon as it finishes, in completion order
+        for future in as_completed(futures):
+            day, league = futures[future]
+            try:
+                count = future.result()
+            except Exception as e:
+                print(f"Error backfilling {league} {day}: {e}")
+                count = None
+            if count is None:
+                summary["failed"].append((day, league))
+                continue
+
+            print(f"Backfilled {count} highlights for {league} {day}.")
+            summary["records"] += count
+
+    # Report how the backfill went
+    summary["seconds"] = round(time.monotonic() - start, 2)
+    print(f"Backfill finished in {summary['seconds']}s: {summary['records']} records, "
+          f"{len(summary['failed'])} failed pairs.")
+    for day, league in summary["failed"]:
+        print(f"  Failed: {league} {day}")
+    return summary
+
+# Check if this script is being run as the main program
+# If so, execute the 'run_backfill' function
+if __name__ == "__main__":
+    run_backfill()
@@ -31,6 +31,31 @@ LEAGUE_NAME = os.getenv("LEAGUE_NAME", "NCAA")
 # It converts the 'LIMIT' environment variable to an integer, defaulting to 10 if not set.
 LIMIT = int(os.getenv("LIMIT", "10"))
 
+###################################
+# Backfill (backfill.py)
+###################################
+
+# The first date (YYYY-MM-DD) of the range to backfill.
+# If the 'BACKFILL_START_DATE' environment variable is not set, it defaults to DATE.
+BACKFILL_START_DATE = os.getenv("BACKFILL_START_DATE", DATE)
+
+# The last date (YYYY-MM-DD, inclusive) of the range to backfill.
+# If the 'BACKFILL_END_DATE' environment variable is not set, it defaults to the start date.
+BACKFILL_END_DATE = os.getenv("BACKFILL_END_DATE", BACKFILL_START_DATE)
+
+# A comma-separated list of leagues to backfill, defaulting to LEAGUE_NAME if not set.
+BACKFILL_LEAGUES = os.getenv("BACKFILL_LEAGUES", LEAGUE_NAME)
+
+# The number of date/league pairs fetched at the same time, defaulting to 8 if not set.
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "8"))
+
+# The maximum number of API calls per second across all backfill workers, defaulting to 5.
+BACKFILL_REQUESTS_PER_SECOND = float(os.getenv("BACKFILL_REQUESTS_PER_SECOND", "5"))
+
+# The most pages fetched for one date/league pair, defaulting to 100 if not set.
+# It stops a pair whose API responses never end from using up the shared rate limit.
+BACKFILL_MAX_PAGES = int(os.getenv("BACKFILL_MAX_PAGES", "100"))
+
 ###################################
 # AWS & S3
 ###################################
@@ -69,17 +94,54 @@ INPUT_KEY = os.getenv("INPUT_KEY", "highlights/basketball_highlights.json")
 OUTPUT_KEY = os.getenv("OUTPUT_KEY", "videos/first_video.mp4")
 
 ###################################
-# run_all.py Retry/Delay Config
+# Shared HTTP Session (http_client.py)
+###################################
+
+# Project defaults for the shared HTTP session. http_client.py is the same in every project;
+# only the values that differ from its defaults (10 connections, 3 retries, 0.5s backoff, 10s timeout)
+# are set here. The HTTP_POOL_SIZE, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR and HTTP_TIMEOUT
+# environment variables still override them.
+HTTP_SETTINGS = {
+    # The base delay (in seconds) of the exponential backoff between retries
+    "HTTP_BACKOFF_FACTOR": 1,
+    # The API can be slow to answer large highlight queries, so wait up to 300 seconds
+    "HTTP_TIMEOUT": 300
+}
+
+###################################
+# Streaming Video Transfer
+###################################
+
+# The size (in bytes) of each part of the multipart upload used to stream videos into S3.
+# S3 requires at least 5 MiB per part; it defaults to 8 MiB if not set.
+# Peak memory per video is roughly (UPLOAD_MAX_IN_FLIGHT + 1) * UPLOAD_PART_SIZE.
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))
+
+# The maximum number of parts uploading to S3 at the same time, defaulting to 4 if not set.
+UPLOAD_MAX_IN_FLIGHT = int(os.getenv("UPLOAD_MAX_IN_FLIGHT", "4"))
+
+# The size (in bytes) of each chunk read from the video download, defaulting to 1 MiB if not set.
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# The timeout (in seconds) for connecting to and reading from the video URL, defaulting to 120.
+DOWNLOAD_TIMEOUT = int(os.getenv("DOWNLOAD_TIMEOUT", "120"))
+
+###################################
+# run_all.py Retry/Readiness Config
 ###################################
 
 # The number of times to retry a failed operation. 
 # It converts the 'RETRY_COUNT' environment variable to an integer, defaulting to 3 if not set.
 RETRY_COUNT = int(os.getenv("RETRY_COUNT", "3"))
 
-# The delay (in seconds) between retry attempts. 
+# The base delay (in seconds) between retry attempts; it doubles after every failed attempt.
 # It converts the 'RETRY_DELAY' environment variable to an integer, defaulting to 30 seconds if not set.
 RETRY_DELAY = int(os.getenv("RETRY_DELAY", "30"))
 
-# The waiting time (in seconds) between the execution of different scripts within the pipeline.
-# It converts the 'WAIT_TIME_BETWEEN_SCRIPTS' environment variable to an integer, defaulting to 60 seconds if not set.
-WAIT_TIME_BETWEEN_SCRIPTS = int(os.getenv("WAIT_TIME_BETWEEN_SCRIPTS", "60"))
\ No newline at end of file
+# The maximum time (in seconds) a stage waits for its input to appear in S3.
+# It converts the 'READY_TIMEOUT' environment variable to an integer, defaulting to 300 seconds if not set.
+READY_TIMEOUT = int(os.getenv("READY_TIMEOUT", "300"))
+
+# How often (in seconds) a stage checks whether its input has appeared in S3.
+# It converts the 'READY_POLL_INTERVAL' environment variable to an integer, defaulting to 5 seconds if not set.
+READY_POLL_INTERVAL = int(os.getenv("READY_POLL_INTERVAL", "5"))
\ No newline at end of file
@@ -6,12 +6,9 @@ import json
 # Import the 'boto3' library for interacting with AWS services like S3
 import boto3
 
-# Import the 'requests' library for making HTTP requests to external APIs
+# Import the 'requests' library for its exception types
 import requests
 
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-
 # Import specific configuration variables from the 'config.py' module
 from config import (
     API_URL,             # The endpoint URL for fetching sports highlights
@@ -24,23 +21,33 @@ from config import (
     AWS_REGION,          # The AWS region where the S3 bucket is located
 )
 
-def fetch_highlights():
+# Import the shared keep-alive session (with retries and a default timeout)
+from http_client import get_session
+
+def fetch_highlights(date=DATE, league_name=LEAGUE_NAME, limit=LIMIT, offset=0):
     """
-    Fetch basketball highlights from the API.
+    Fetch one page of basketball highlights from the API.
     
     This function makes a GET request to the specified API endpoint with the necessary
     headers and query parameters to retrieve basketball highlights. It handles any
     request-related exceptions and returns the fetched highlights as a JSON object.
     
+    Args:
+        date (str, optional): The date (YYYY-MM-DD) to fetch highlights for. Defaults to DATE.
+        league_name (str, optional): The league to fetch highlights for. Defaults to LEAGUE_NAME.
+        limit (int, optional): The maximum number of highlights per page. Defaults to LIMIT.
+        offset (int, optional): The number of highlights to skip (for paging). Defaults to 0.
+    
     Returns:
         dict or None: The fetched highlights as a JSON dictionary if successful; otherwise, None.
     """
     try:
         # Define the query parameters for the API request
         query_params = {
-            "date": DATE,            # The specific date for which to fetch highlights
-            "leagueName": LEAGUE_NAME,  # The name of the league (e.g., NCAA)
-            "limit": LIMIT            # The maximum number of highlights to retrieve
+            "date": date,               # The specific date for which to fetch highlights
+            "leagueName": league_name,  # The name of the league (e.g., NCAA)
+            "limit": limit,             # The maximum number of highlights to retrieve
+            "offset": offset            # The number of highlights to skip (for paging)
         }
         
         # Define the headers for the API request, including authentication details
@@ -50,11 +57,8 @@ def fetch_highlights():
         }
 
         # Make a GET request to the API endpoint with the specified headers and query parameters
-        # Set a timeout of 120 seconds to prevent hanging requests
-        session = requests.Session()
-        retries = Retry(total=3, backoff_factor=1)
-        session.mount('https://', HTTPAdapter(max_retries=retries))
-        response = session.get(API_URL, headers=headers, params=query_params, timeout=300)
+        # The shared session reuses open connections and applies the retry policy and timeout
+        response = get_session().get(API_URL, headers=headers, params=query_params)
         
         # Raise an HTTPError if the HTTP request returned an unsuccessful status code
         response.raise_for_status()
@@ -136,6 +140,9 @@ def process_highlights():
     This function orchestrates the workflow of fetching basketball highlights from the API
     and saving them to an S3 bucket. It first calls 'fetch_highlights' to retrieve the data,
     and if successful, proceeds to call 'save_to_s3' to store the data in S3.
+    
+    Returns:
+        dict or None: The fetched highlights if successful; otherwise, None.
     """
     # Print a message indicating the start of the highlights fetching process
     print("Fetching highlights...")
@@ -151,6 +158,9 @@ def process_highlights():
         # Call the 'save_to_s3' function to upload the fetched highlights to S3
         save_to_s3(highlights, "basketball_highlights")
 
+    # Return the highlights so the next stage can use them without re-reading S3
+    return highlights
+
 # Check if this script is being run as the main program
 # If so, execute the 'process_highlights' function
 if __name__ == "__main__":
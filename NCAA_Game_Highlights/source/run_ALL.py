@@ -1,101 +1,153 @@
 # run_all.py
 
-# Import the 'subprocess' module to run external scripts as subprocesses
-import subprocess
-
-# Import the 'time' module to handle delays between script executions
+# Import the 'time' module to wait between retry attempts
 import time
 
+# Import the 'boto3' library to check that stage inputs exist in S3
+import boto3
+
+# Import the thread pool helpers used to run stages as soon as their inputs are ready
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
 # Import specific configuration variables from the 'config.py' module
 from config import (
-    RETRY_COUNT,               # The number of retry attempts for failed scripts
-    RETRY_DELAY,               # The delay (in seconds) between retry attempts
-    WAIT_TIME_BETWEEN_SCRIPTS  # The waiting time (in seconds) between different scripts
+    RETRY_COUNT,          # The number of retry attempts for failed stages
+    RETRY_DELAY,          # The base delay (in seconds) for exponential backoff between retries
+    READY_TIMEOUT,        # The maximum time (in seconds) to wait for a stage's input in S3
+    READY_POLL_INTERVAL,  # How often (in seconds) to check for a stage's input in S3
+    S3_BUCKET_NAME,       # The name of the S3 bucket holding the stage inputs
+    AWS_REGION            # The AWS region where the S3 bucket is located
 )
 
-def run_script(script_name, retries=RETRY_COUNT, delay=RETRY_DELAY):
+# Import the pipeline stages as functions so they run in this process
+# (one interpreter and one boto3 import for the whole pipeline)
+from fetch import process_highlights
+from process_1_video import process_one_video
+from MediaConvert_process import create_job
+
+def run_stage(name, func, inputs, retries=RETRY_COUNT, delay=RETRY_DELAY):
     """
-    Run a script with retry logic and a delay.
-    
-    This function attempts to execute a given Python script using subprocess.
-    If the script fails, it retries the execution up to a specified number of times,
-    waiting for a specified delay between attempts.
-    
+    Run a pipeline stage in-process with retry logic and exponential backoff.
+
     Args:
-        script_name (str): The name of the Python script to execute.
-        retries (int, optional): The maximum number of retry attempts. Defaults to RETRY_COUNT.
-        delay (int, optional): The delay in seconds between retry attempts. Defaults to RETRY_DELAY.
-    
+        name (str): The name of the stage, used in log messages.
+        func (callable): The stage function to call.
+        inputs (dict): The keyword arguments (dependency results) to pass to the stage.
+        retries (int, optional): The maximum number of attempts. Defaults to RETRY_COUNT.
+        delay (int, optional): The delay before the first retry, doubled after each
+            failed attempt. Defaults to RETRY_DELAY.
+
+    Returns:
+        The value returned by the stage function.
+
     Raises:
-        subprocess.CalledProcessError: If the script fails after all retry attempts.
+        Exception: The last error if the stage fails after all retry attempts.
     """
-    # Initialize the attempt counter to zero
-    attempt = 0
-    
-    # Continue attempting to run the script until the maximum number of retries is reached
-    while attempt < retries:
+    for attempt in range(1, retries + 1):
         try:
-            # Inform the user that the script is being run, including the current attempt number
-            print(f"Running {script_name} (attempt {attempt + 1}/{retries})...")
-            
-            # Execute the script as a subprocess
-            # 'check=True' ensures that a CalledProcessError is raised if the script exits with a non-zero status
-            subprocess.run(["python", script_name], check=True)
-            
-            # Inform the user that the script completed successfully
-            print(f"{script_name} completed successfully.")
-            
-            # Exit the function if the script ran successfully
-            return
-        except subprocess.CalledProcessError as e:
-            # Inform the user that an error occurred while running the script
-            print(f"Error running {script_name}: {e}")
-            
-            # Increment the attempt counter
-            attempt += 1
-            
-            # Check if the maximum number of retries has not been reached
+            # Inform the user that the stage is being run, including the current attempt number
+            print(f"Running {name} (attempt {attempt}/{retries})...")
+            result = func(**inputs)
+            print(f"{name} completed successfully.")
+            return result
+        except Exception as e:
+            # Inform the user that an error occurred while running the stage
+            print(f"Error running {name}: {e}")
             if attempt < retries:
-                # Inform the user that the script will be retried after a delay
-                print(f"Retrying in {delay} seconds...")
-                
-                # Wait for the specified delay before retrying
-                time.sleep(delay)
+                # Wait longer after every failed attempt (30s, 60s, 120s, ...)
+                backoff = delay * 2 ** (attempt - 1)
+                print(f"Retrying in {backoff} seconds...")
+                time.sleep(backoff)
             else:
-                # Inform the user that the script has failed after all retry attempts
-                print(f"{script_name} failed after {retries} attempts.")
-                
-                # Re-raise the exception to propagate the error
-                raise e
+                # Inform the user that the stage has failed after all retry attempts
+                print(f"{name} failed after {retries} attempts.")
+                raise
 
-def main():
+def run_pipeline(stages):
+    """
+    Run a DAG of stages, starting each one as soon as all of its dependencies have finished.
+
+    Args:
+        stages (dict): Maps a stage name to (function, [dependency names]). Each function
+            receives the results of its dependencies as keyword arguments.
+
+    Returns:
+        dict: The result of every stage, keyed by stage name.
+    """
+    results = {}
+    running = {}
+    pending = dict(stages)
+    with ThreadPoolExecutor(max_workers=len(stages)) as executor:
+        while pending or running:
+            # Start every pending stage whose dependencies have all finished
+            for name, (func, deps) in list(pending.items()):
+                if all(dep in results for dep in deps):
+                    inputs = {dep: results[dep] for dep in deps}
+                    running[executor.submit(run_stage, name, func, inputs)] = name
+                    del pending[name]
+            if not running:
+                raise RuntimeError(f"Unresolvable stage dependencies: {', '.join(pending)}")
+
+            # Wait for the next stage to finish; a failed stage stops the pipeline
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+    return results
+
+def wait_for_object(key, timeout=READY_TIMEOUT, interval=READY_POLL_INTERVAL):
     """
-    Main function to orchestrate the execution of multiple scripts in a pipeline.
-    
-    This function runs a series of Python scripts in a specific order, introducing
-    delays between them to ensure that resources are stabilized before the next script runs.
-    It handles any exceptions that occur during the execution of the scripts.
+    Block until the key exists in the S3 bucket, instead of sleeping a fixed time.
     """
-    try:
-        # Step 1: Run fetch.py
-        run_script("fetch.py")
+    s3 = boto3.client("s3", region_name=AWS_REGION)
+    s3.get_waiter("object_exists").wait(
+        Bucket=S3_BUCKET_NAME,
+        Key=key,
+        WaiterConfig={"Delay": interval, "MaxAttempts": max(1, timeout // interval)}
+    )
+
+def fetch_stage():
+    # Fetch the highlights and keep them in memory for the next stage
+    highlights = process_highlights()
+    if not highlights:
+        raise RuntimeError("No highlights were fetched.")
+    return highlights
 
-        # Buffer time between scripts to allow resources to stabilize
-        print("Waiting for resources to stabilize...")
-        time.sleep(WAIT_TIME_BETWEEN_SCRIPTS)
+def process_video_stage(fetch):
+    # Stream the first video into S3 using the highlights from the fetch stage
+    video_key = process_one_video(highlights=fetch)
+    if not video_key:
+        raise RuntimeError("The video was not uploaded.")
+    return video_key
 
-        # Step 2: Run process_one_video.py
-        run_script("process_1_video.py")
+def mediaconvert_stage(process_video):
+    # Make sure the uploaded video is visible in S3, then submit the MediaConvert job
+    wait_for_object(process_video)
+    job = create_job(input_key=process_video)
+    if job is None:
+        raise RuntimeError(f"MediaConvert job for {process_video} was not created.")
+    return job
 
-        # Buffer time between scripts to allow resources to stabilize
-        print("Waiting for resources to stabilize...")
-        time.sleep(WAIT_TIME_BETWEEN_SCRIPTS)
+# The pipeline: each stage maps to its function and the stages whose results it needs
+PIPELINE = {
+    "fetch": (fetch_stage, []),
+    "process_video": (process_video_stage, ["fetch"]),
+    "mediaconvert": (mediaconvert_stage, ["process_video"]),
+}
 
-        # Step 3: Run mediaconvert_process.py
-        run_script("MediaConvert_process.py")
+def main():
+    """
+    Main function to orchestrate the pipeline.
+
+    This function runs fetch -> process video -> MediaConvert in this process, passing
+    each stage's result to the next in memory. A stage starts as soon as its inputs are
+    ready instead of after a fixed sleep, and failed stages are retried with backoff.
+    """
+    try:
+        run_pipeline(PIPELINE)
 
-        # Inform the user that all scripts have been executed successfully
-        print("All scripts executed successfully.")
+        # Inform the user that all stages have been executed successfully
+        print("All stages executed successfully.")
     except Exception as e:
         # Inform the user that the pipeline has failed and provide the error details
         print(f"Pipeline failed: {e}")
@@ -103,4 +155,4 @@ def main():
 # Check if this script is being run as the main program
 # If so, execute the 'main' function
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
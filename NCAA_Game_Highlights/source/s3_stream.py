@@ -0,0 +1,38 @@
+# s3_stream.py
+
+# Import specific configuration variables from the 'config.py' module
+from config import (
+    UPLOAD_PART_SIZE,      # The size (in bytes) of each multipart upload part
+    UPLOAD_MAX_IN_FLIGHT,  # The maximum number of parts uploading at the same time
+    DOWNLOAD_CHUNK_SIZE,   # The size (in bytes) of each chunk read from the HTTP response
+    DOWNLOAD_TIMEOUT       # The timeout (in seconds) for the video download request
+)
+
+# Import the shared keep-alive session used to download the video from its URL
+from http_client import get_session
+
+# Import the multipart uploader shared with the other projects (s3_multipart.py is the same file in each)
+from s3_multipart import stream_to_s3
+
+def stream_url_to_s3(s3, url, bucket, key, content_type="video/mp4"):
+    """
+    Download a URL and pipe the response body straight into S3 in fixed-size chunks.
+
+    Args:
+        s3: The boto3 S3 client.
+        url (str): The URL of the video to download.
+        bucket (str): The target S3 bucket.
+        key (str): The S3 key (path) for the uploaded video.
+        content_type (str, optional): The MIME type of the uploaded object.
+
+    Returns:
+        int: The number of bytes uploaded.
+    """
+    # 'stream=True' keeps the body on the socket until we read it chunk by chunk
+    with get_session().get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        # Raise an HTTPError if the HTTP request returned an unsuccessful status code
+        response.raise_for_status()
+        chunks = response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE)
+        # Regroup the chunks into multipart upload parts, uploading up to UPLOAD_MAX_IN_FLIGHT at once
+        return stream_to_s3(s3, chunks, bucket, key, part_size=UPLOAD_PART_SIZE,
+                            max_in_flight=UPLOAD_MAX_IN_FLIGHT, ContentType=content_type)
@@ -44,7 +44,7 @@ resource "aws_iam_role_policy_attachment" "ecs_task_execution_attach" {
 data "aws_iam_policy_document" "ecs_custom_doc" {
   # 1) S3 Permissions
   statement {
-    actions   = ["s3:GetObject", "s3:PutObject", "s3:CreateBucket", "s3:ListBucket"]
+    actions   = ["s3:GetObject", "s3:PutObject", "s3:AbortMultipartUpload", "s3:CreateBucket", "s3:ListBucket"]
     effect    = "Allow"
     resources = [
       "arn:aws:s3:::${var.s3_bucket_name}",     # Bucket-level permissions
@@ -0,0 +1,124 @@
+# backfill.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from config import (
+    LIMIT,
+    BACKFILL_START_DATE,
+    BACKFILL_END_DATE,
+    BACKFILL_LEAGUES,
+    BACKFILL_CONCURRENCY,
+    BACKFILL_REQUESTS_PER_SECOND,
+    BACKFILL_MAX_PAGES
+)
+from fetch import fetch_highlights, save_to_s3, store_highlights_to_dynamodb
+
+class RateLimiter:
+    """
+    Space API calls evenly so all workers together stay under 'rate' requests per second.
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def date_range(start_date, end_date):
+    """
+    Yield every YYYY-MM-DD date from start_date to end_date, inclusive.
+    """
+    day = date.fromisoformat(start_date)
+    last = date.fromisoformat(end_date)
+    while day <= last:
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+def backfill_pair(day, league, limiter, limit=LIMIT, max_pages=BACKFILL_MAX_PAGES):
+    """
+    Page through the API's offset/limit results for one date and league, writing each
+    page to S3 and DynamoDB as soon as it arrives.
+    Returns the number of records written, or None if a page failed or the pair still had
+    results after max_pages pages (earlier pages stay saved).
+    """
+    offset = 0
+    previous = None
+    for page_number in range(max_pages):
+        limiter.acquire()
+        page = fetch_highlights(date=day, league_name=league, limit=limit, offset=offset)
+        if page is None:
+            print(f"Page {page_number} of {league} {day} failed after {offset} records.")
+            return None
+        data = page.get("data", [])
+        # An API that ignores 'offset' sends the same page again, which is already saved
+        if data and data == previous:
+            print(f"Page {page_number} of {league} {day} repeats the previous page, stopping.")
+            return offset
+        if data:
+            # One object per page, so a rerun overwrites the same keys
+            save_to_s3(page, f"backfill/{league}/{day}/page_{page_number:04d}")
+            store_highlights_to_dynamodb(page, fetch_date=day)
+        offset += len(data)
+        previous = data
+
+        # An empty or short page, or the reported total, ends the pair
+        total = page.get("pagination", {}).get("totalCount")
+        if len(data) < limit or (total is not None and offset >= total):
+            return offset
+
+    print(f"{league} {day} still had results after {max_pages} pages (BACKFILL_MAX_PAGES), stopping.")
+    return None
+
+def run_backfill(start_date=BACKFILL_START_DATE, end_date=BACKFILL_END_DATE,
+                 leagues=BACKFILL_LEAGUES, concurrency=BACKFILL_CONCURRENCY,
+                 requests_per_second=BACKFILL_REQUESTS_PER_SECOND):
+    """
+    Fetch highlights for every date x league pair concurrently under a shared rate limit,
+    writing each page to S3 and DynamoDB as it arrives.
+    Returns a summary with the record count and the pairs that failed.
+    """
+    if isinstance(leagues, str):
+        leagues = [league.strip() for league in leagues.split(",") if league.strip()]
+    pairs = [(day, league) for day in date_range(start_date, end_date) for league in leagues]
+    print(f"Backfilling {len(pairs)} date/league pairs from {start_date} to {end_date} "
+          f"for {', '.join(leagues)}...")
+
+    limiter = RateLimiter(requests_per_second)
+    summary = {"pairs": len(pairs), "records": 0, "failed": []}
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {
+            executor.submit(backfill_pair, day, league, limiter): (day, league)
+            for day, league in pairs
+        }
+        for future in as_completed(futures):
+            day, league = futures[future]
+            try:
+                count = future.result()
+            except Exception as e:
+                print(f"Error backfilling {league} {day}: {e}")
+                count = None
+            if count is None:
+                summary["failed"].append((day, league))
+                continue
+
+            print(f"Backfilled {count} highlights for {league} {day}.")
+            summary["records"] += count
+
+    summary["seconds"] = round(time.monotonic() - start, 2)
+    print(f"Backfill finished in {summary['seconds']}s: {summary['records']} records, "
+          f"{len(summary['failed'])} failed pairs.")
+    for day, league in summary["failed"]:
+        print(f"  Failed: {league} {day}")
+    return summary
+
+if __name__ == "__main__":
+    run_backfill()
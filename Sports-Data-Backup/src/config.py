@@ -14,6 +14,19 @@ DATE = os.getenv("DATE", datetime.utcnow().strftime("%Y-%m-%d"))
 LEAGUE_NAME = os.getenv("LEAGUE_NAME", "NCAA")
 LIMIT = int(os.getenv("LIMIT", "10"))
 
+###################################
+# Backfill (backfill.py)
+###################################
+# Inclusive YYYY-MM-DD range and comma-separated leagues to re-fetch.
+BACKFILL_START_DATE = os.getenv("BACKFILL_START_DATE", DATE)
+BACKFILL_END_DATE = os.getenv("BACKFILL_END_DATE", BACKFILL_START_DATE)
+BACKFILL_LEAGUES = os.getenv("BACKFILL_LEAGUES", LEAGUE_NAME)
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "8"))
+# Upper bound on API calls per second across all backfill workers.
+BACKFILL_REQUESTS_PER_SECOND = float(os.getenv("BACKFILL_REQUESTS_PER_SECOND", "5"))
+# Most pages fetched per date/league pair, in case the API never sends a last page.
+BACKFILL_MAX_PAGES = int(os.getenv("BACKFILL_MAX_PAGES", "100"))
+
 ###################################
 # AWS & S3
 ###################################
@@ -24,12 +37,35 @@ AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 # DynamoDB
 ###################################
 DYNAMODB_TABLE = os.getenv("DYNAMODB_TABLE", "SportsHighlights")
+# Unprocessed batch items are retried with exponential backoff (base delay in seconds).
+DYNAMODB_MAX_RETRIES = int(os.getenv("DYNAMODB_MAX_RETRIES", "5"))
+DYNAMODB_BACKOFF_BASE = float(os.getenv("DYNAMODB_BACKOFF_BASE", "0.1"))
 
 ###################################
 # MediaConvert
 ###################################
 MEDIACONVERT_ENDPOINT = os.getenv("MEDIACONVERT_ENDPOINT")
 MEDIACONVERT_ROLE_ARN = os.getenv("MEDIACONVERT_ROLE_ARN")
+# Jobs submitted at once, and retries when MediaConvert throttles a submission.
+MEDIACONVERT_CONCURRENCY = int(os.getenv("MEDIACONVERT_CONCURRENCY", "2"))
+MEDIACONVERT_MAX_RETRIES = int(os.getenv("MEDIACONVERT_MAX_RETRIES", "5"))
+# Output: "HLS" or "CMAF" adaptive bitrate ladder, or "MP4" for the single 5 Mbps file.
+# ABR_LADDER lists renditions as HEIGHT:MAX_BITRATE, encoded with QVBR; each
+# rendition's width follows the input's aspect ratio.
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "HLS")
+ABR_LADDER = os.getenv(
+    "ABR_LADDER",
+    "1080:6000000,720:3500000,480:1500000,360:800000"
+)
+QVBR_QUALITY_LEVEL = int(os.getenv("QVBR_QUALITY_LEVEL", "7"))
+SEGMENT_LENGTH = int(os.getenv("SEGMENT_LENGTH", "6"))
+AUDIO_BITRATE = int(os.getenv("AUDIO_BITRATE", "96000"))
+# Job tracking: polling backs off from the min to the max interval (seconds) while no
+# job changes status. WAIT_FOR_TRANSCODE makes run_all.py block until jobs finish.
+TRACKER_MIN_INTERVAL = float(os.getenv("TRACKER_MIN_INTERVAL", "5"))
+TRACKER_MAX_INTERVAL = float(os.getenv("TRACKER_MAX_INTERVAL", "60"))
+WAIT_FOR_TRANSCODE = os.getenv("WAIT_FOR_TRANSCODE", "false").lower() == "true"
+TRANSCODE_TIMEOUT = int(os.getenv("TRANSCODE_TIMEOUT", "3600"))
 
 ###################################
 # Video Paths in S3
@@ -37,10 +73,57 @@ MEDIACONVERT_ROLE_ARN = os.getenv("MEDIACONVERT_ROLE_ARN")
 INPUT_KEY = os.getenv("INPUT_KEY", "highlights/basketball_highlights.json")
 # Note: For multiple videos, you may want to use a key pattern rather than a fixed name.
 OUTPUT_KEY_PREFIX = os.getenv("OUTPUT_KEY_PREFIX", "videos/")
+PROCESSED_KEY_PREFIX = os.getenv("PROCESSED_KEY_PREFIX", "processed_videos/")
+
+###################################
+# Video Dedup (dedup.py)
+###################################
+# JSON manifest of videos already backed up, keyed by source URL + ETag/Content-Length
+# and by content SHA-256. Set DEDUP_ENABLED=false to re-download everything.
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+MANIFEST_KEY = os.getenv("MANIFEST_KEY", "manifests/video_manifest.json")
+
+###################################
+# Shared HTTP Session (http_client.py)
+###################################
+# Only values that differ from http_client.SETTINGS; HTTP_* environment variables still win.
+HTTP_SETTINGS = {
+    "HTTP_POOL_SIZE": 16,  # Should cover VIDEO_CONCURRENCY and BACKFILL_CONCURRENCY
+    "HTTP_BACKOFF_FACTOR": 1,
+    "HTTP_TIMEOUT": 120
+}
+
+###################################
+# Streaming Video Transfer
+###################################
+# Peak memory per video is roughly (UPLOAD_MAX_IN_FLIGHT + 1) * UPLOAD_PART_SIZE.
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_MAX_IN_FLIGHT = int(os.getenv("UPLOAD_MAX_IN_FLIGHT", "4"))
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))
+DOWNLOAD_TIMEOUT = int(os.getenv("DOWNLOAD_TIMEOUT", "120"))
+
+###################################
+# Concurrent Video Processing
+###################################
+# Total peak memory is about VIDEO_CONCURRENCY times the per-video figure above.
+VIDEO_CONCURRENCY = int(os.getenv("VIDEO_CONCURRENCY", "4"))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("MAX_CONNECTIONS_PER_HOST", "2"))
+
+###################################
+# Streaming Pipeline (PIPELINE_MODE=streaming)
+###################################
+# "stages" runs fetch -> all uploads -> MediaConvert; "streaming" submits each
+# video's transcode job as soon as that video has been uploaded.
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "stages")
+# Maximum number of videos waiting between two streaming stages.
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "8"))
 
 ###################################
-# run_all.py Retry/Delay Config
+# run_all.py Retry/Readiness Config
 ###################################
 RETRY_COUNT = int(os.getenv("RETRY_COUNT", "3"))
+# Base delay for exponential backoff between stage retries (30s, 60s, 120s, ...).
 RETRY_DELAY = int(os.getenv("RETRY_DELAY", "30"))
-WAIT_TIME_BETWEEN_SCRIPTS = int(os.getenv("WAIT_TIME_BETWEEN_SCRIPTS", "60"))
+# How long a stage waits for its S3 inputs to appear, and how often it checks.
+READY_TIMEOUT = int(os.getenv("READY_TIMEOUT", "300"))
+READY_POLL_INTERVAL = int(os.getenv("READY_POLL_INTERVAL", "5"))
@@ -0,0 +1,183 @@
+# dedup.py
+import json
+import threading
+import requests
+from botocore.exceptions import ClientError
+
+from config import (
+    S3_BUCKET_NAME,
+    MANIFEST_KEY,
+    DOWNLOAD_TIMEOUT
+)
+from http_client import get_session
+
+def source_fingerprint(url):
+    """
+    Identify a remote video by its URL plus the ETag (or Last-Modified) and Content-Length
+    from a HEAD request. Returns None if the server gives us nothing to identify it by.
+    """
+    try:
+        response = get_session().head(url, allow_redirects=True, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"HEAD request failed for {url}: {e}")
+        return None
+    version = response.headers.get("ETag") or response.headers.get("Last-Modified")
+    length = response.headers.get("Content-Length")
+    if not version or not length:
+        return None
+    return f"{url}|{version}|{length}"
+
+def unversioned_fingerprint(url):
+    """
+    Fallback for a source without ETag/Last-Modified or Content-Length: identify it by URL
+    alone. Its entry also records the stored object's ETag, checked by stored_object_matches.
+    """
+    return f"{url}|unversioned"
+
+def stored_object_matches(s3, entry):
+    """
+    True if the object an entry points at is still in S3 and, when the entry recorded
+    an ETag, still has that ETag (i.e. it is the object we uploaded).
+    """
+    if "etag" not in entry:
+        return True
+    try:
+        response = s3.head_object(Bucket=S3_BUCKET_NAME, Key=entry["key"])
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("NoSuchKey", "404"):
+            raise
+        return False
+    return response["ETag"] == entry["etag"]
+
+class VideoManifest:
+    """
+    Record of every video already backed up, stored as a JSON object in S3.
+    'sources' maps a source fingerprint to the stored object; 'hashes' maps the
+    SHA-256 of the video content to its S3 key, to catch the same video under a new URL.
+    Changes are kept as a list of pending operations until a conditional put succeeds,
+    so a concurrent run's changes are merged in rather than overwritten.
+    """
+    def __init__(self, s3, key=MANIFEST_KEY):
+        self.s3 = s3
+        self.key = key
+        self.lock = threading.Lock()
+        # Only one thread writes the manifest at a time; lookups keep going meanwhile.
+        self.save_lock = threading.Lock()
+        self.sources = {}
+        self.hashes = {}
+        self.etag = None
+        self.pending = []
+
+    def _read(self):
+        try:
+            response = self.s3.get_object(Bucket=S3_BUCKET_NAME, Key=self.key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("NoSuchKey", "404"):
+                raise
+            return {}, {}, None
+        manifest = json.loads(response["Body"].read().decode("utf-8"))
+        return manifest.get("sources", {}), manifest.get("hashes", {}), response["ETag"]
+
+    def load(self):
+        sources, hashes, etag = self._read()
+        with self.lock:
+            self.sources, self.hashes, self.etag = sources, hashes, etag
+        if etag:
+            print(f"Loaded video manifest with {len(sources)} sources.")
+        else:
+            print("No video manifest found, starting a new one.")
+        return self
+
+    def lookup(self, fingerprint):
+        if fingerprint is None:
+            return None
+        with self.lock:
+            return self.sources.get(fingerprint)
+
+    def find_content(self, sha256):
+        with self.lock:
+            return self.hashes.get(sha256)
+
+    def _forget(self, key, keep_sha256=None):
+        # Drop every entry pointing at 'key', except those for the content now stored there.
+        self.sources = {
+            fingerprint: entry for fingerprint, entry in self.sources.items()
+            if entry["key"] != key or entry["sha256"] == keep_sha256
+        }
+        self.hashes = {
+            sha256: stored for sha256, stored in self.hashes.items()
+            if stored != key or sha256 == keep_sha256
+        }
+
+    def _apply(self, operation):
+        action, fingerprint, key, sha256, size, etag = operation
+        if action == "forget":
+            self._forget(key)
+            return
+        # The key may have held other content before; those entries no longer hold.
+        self._forget(key, keep_sha256=sha256)
+        if fingerprint is not None:
+            self.sources[fingerprint] = {"key": key, "sha256": sha256, "bytes": size}
+            if etag is not None:
+                self.sources[fingerprint]["etag"] = etag
+        self.hashes.setdefault(sha256, key)
+
+    def record(self, fingerprint, key, sha256, size, etag=None):
+        """
+        Record that the source 'fingerprint' is stored at 'key'. 'etag' is the stored
+        object's ETag, kept for unversioned sources so a later run can check the object.
+        """
+        with self.lock:
+            operation = ("record", fingerprint, key, sha256, size, etag)
+            self._apply(operation)
+            self.pending.append(operation)
+
+    def forget(self, key):
+        """
+        Remove every entry pointing at 'key', e.g. after the object was deleted.
+        """
+        with self.lock:
+            operation = ("forget", None, key, None, None, None)
+            self._apply(operation)
+            self.pending.append(operation)
+
+    def save(self, max_attempts=5):
+        """
+        Write pending changes with a conditional put (If-Match on the ETag we loaded).
+        If another run wrote the manifest in the meantime, reload it, replay our
+        pending changes on top and try again.
+        """
+        with self.save_lock:
+            for _ in range(max_attempts):
+                with self.lock:
+                    if not self.pending:
+                        return
+                    written = len(self.pending)
+                    body = json.dumps({"sources": self.sources, "hashes": self.hashes})
+                    condition = {"IfMatch": self.etag} if self.etag else {"IfNoneMatch": "*"}
+                try:
+                    response = self.s3.put_object(
+                        Bucket=S3_BUCKET_NAME,
+                        Key=self.key,
+                        Body=body,
+                        ContentType="application/json",
+                        **condition
+                    )
+                except ClientError as e:
+                    if e.response["Error"]["Code"] not in ("PreconditionFailed", "ConditionalRequestConflict"):
+                        raise
+                    print("Video manifest changed in S3 since it was loaded, merging...")
+                    sources, hashes, etag = self._read()
+                    with self.lock:
+                        self.sources, self.hashes, self.etag = sources, hashes, etag
+                        for operation in self.pending:
+                            self._apply(operation)
+                    continue
+                with self.lock:
+                    self.etag = response["ETag"]
+                    del self.pending[:written]
+                    count = len(self.sources)
+                print(f"Saved video manifest with {count} sources.")
+                return
+            raise RuntimeError(f"Could not save the video manifest after {max_attempts} attempts.")
@@ -1,5 +1,7 @@
 #fetch.py
 import json
+import random
+import time
 import boto3
 import requests
 
@@ -13,24 +15,31 @@ from config import (
     S3_BUCKET_NAME,
     AWS_REGION,
     DYNAMODB_TABLE,
+    DYNAMODB_MAX_RETRIES,
+    DYNAMODB_BACKOFF_BASE,
 )
+from http_client import get_session
 
-def fetch_highlights():
+# BatchWriteItem accepts at most 25 put requests per call.
+DYNAMODB_BATCH_SIZE = 25
+
+def fetch_highlights(date=DATE, league_name=LEAGUE_NAME, limit=LIMIT, offset=0):
     """
-    Fetch basketball highlights from the API.
+    Fetch one page of basketball highlights from the API.
     """
     try:
         query_params = {
-            "date": DATE,
-            "leagueName": LEAGUE_NAME,
-            "limit": LIMIT
+            "date": date,
+            "leagueName": league_name,
+            "limit": limit,
+            "offset": offset
         }
         headers = {
             "X-RapidAPI-Key": RAPIDAPI_KEY,
             "X-RapidAPI-Host": RAPIDAPI_HOST
         }
 
-        response = requests.get(API_URL, headers=headers, params=query_params, timeout=120)
+        response = get_session().get(API_URL, headers=headers, params=query_params)
         response.raise_for_status()
         highlights = response.json()
         print("Highlights fetched successfully!")
@@ -88,21 +97,43 @@ def save_to_s3(data, file_name):
     except Exception as e:
         print(f"Error saving to S3: {e}")
 
-def store_highlights_to_dynamodb(highlights):
+def batch_write_items(client, items, max_retries=DYNAMODB_MAX_RETRIES):
+    """
+    Write up to 25 items with BatchWriteItem, retrying unprocessed items with
+    exponential backoff. Returns the number of items that could not be written.
+    """
+    request_items = {DYNAMODB_TABLE: [{"PutRequest": {"Item": item}} for item in items]}
+    for attempt in range(max_retries + 1):
+        response = client.batch_write_item(RequestItems=request_items)
+        request_items = response.get("UnprocessedItems") or {}
+        if not request_items:
+            return 0
+        if attempt < max_retries:
+            delay = DYNAMODB_BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.0)
+            print(f"{len(request_items[DYNAMODB_TABLE])} items unprocessed, retrying in {delay:.2f}s...")
+            time.sleep(delay)
+    return len(request_items.get(DYNAMODB_TABLE, []))
+
+def store_highlights_to_dynamodb(highlights, fetch_date=DATE):
     """
-    Store each highlight record into a DynamoDB table.
+    Store the highlight records into a DynamoDB table using 25-item batch writes.
     Assumes that 'highlights' is a dict with a "data" key that is a list of records.
+    Records sharing the same derived id are deduplicated (the last one wins), since
+    BatchWriteItem rejects duplicate keys in a single request.
     """
     try:
         dynamodb = boto3.resource("dynamodb", region_name=AWS_REGION)
-        table = dynamodb.Table(DYNAMODB_TABLE)
-        
-        # Iterate over each highlight record and store it.
+        # The resource's client accepts plain Python types, like table.put_item does.
+        client = dynamodb.meta.client
+
+        records = {}
+        skipped = 0
         for record in highlights.get("data", []):
             # Use the 'id' field if available, or fallback to 'url'
             item_key = record.get("id") or record.get("url")
             if item_key is None:
                 # Skip records without a unique identifier
+                skipped += 1
                 continue
 
             # Convert the item key to a string if it's not already one.
@@ -110,10 +141,24 @@ def store_highlights_to_dynamodb(highlights):
             record["id"] = item_key  # Ensure the record's id field is a string
 
             # Optionally add the fetch date
-            record["fetch_date"] = DATE
+            record["fetch_date"] = fetch_date
+
+            records[item_key] = record
 
-            table.put_item(Item=record)
-            print(f"Stored record with key {item_key} into DynamoDB.")
+        items = list(records.values())
+        duplicates = len(highlights.get("data", [])) - skipped - len(items)
+        failed = 0
+        start = time.monotonic()
+        for i in range(0, len(items), DYNAMODB_BATCH_SIZE):
+            failed += batch_write_items(client, items[i:i + DYNAMODB_BATCH_SIZE])
+        elapsed = time.monotonic() - start
+
+        stored = len(items) - failed
+        rate = stored / elapsed if elapsed > 0 else 0.0
+        print(
+            f"Stored {stored} records into DynamoDB in {elapsed:.2f}s ({rate:.1f} items/s); "
+            f"{duplicates} duplicates dropped, {skipped} without an id, {failed} unprocessed."
+        )
     except Exception as e:
         print(f"Error storing highlights in DynamoDB: {e}")
 
@@ -121,6 +166,7 @@ def store_highlights_to_dynamodb(highlights):
 def process_highlights():
     """
     Main function to fetch and process basketball highlights.
+    Returns the fetched highlights, or None if the fetch failed.
     """
     print("Fetching highlights...")
     highlights = fetch_highlights()
@@ -129,6 +175,7 @@ def process_highlights():
         save_to_s3(highlights, "basketball_highlights")
         print("Storing highlights in DynamoDB...")
         store_highlights_to_dynamodb(highlights)
+    return highlights
 
 if __name__ == "__main__":
     process_highlights()
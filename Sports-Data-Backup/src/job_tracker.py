@@ -0,0 +1,167 @@
+# job_tracker.py
+import threading
+import time
+
+from config import (
+    TRACKER_MIN_INTERVAL,
+    TRACKER_MAX_INTERVAL
+)
+from mediaconvert_process import get_mediaconvert_client
+
+TERMINAL_STATUSES = {"COMPLETE", "ERROR", "CANCELED"}
+
+# Below this many pending jobs, one get_job per job is cheaper than paging list_jobs.
+LIST_JOBS_THRESHOLD = 5
+# How far back (most recent first) list_jobs is paged before falling back to get_job.
+LIST_JOBS_MAX_ITEMS = 200
+
+def _seconds_between(start, end):
+    if start and end:
+        return round((end - start).total_seconds(), 1)
+    return None
+
+class JobTracker:
+    """
+    Track submitted MediaConvert jobs until they finish.
+    Jobs are polled in batches on a background thread, backing off while nothing changes,
+    and completion callbacks fire as each job reaches COMPLETE, ERROR or CANCELED.
+    """
+    def __init__(self, mediaconvert=None, min_interval=TRACKER_MIN_INTERVAL,
+                 max_interval=TRACKER_MAX_INTERVAL):
+        self.mediaconvert = mediaconvert or get_mediaconvert_client()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jobs = {}
+        # Jobs that finished and whose completion callbacks have run.
+        self.settled = set()
+        self.callbacks = []
+        self.condition = threading.Condition()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def add(self, job_id, input_key=None):
+        with self.condition:
+            self.jobs.setdefault(job_id, {
+                "id": job_id, "input_key": input_key, "status": "SUBMITTED",
+                "queue_seconds": None, "transcode_seconds": None, "error": None
+            })
+
+    def on_complete(self, callback):
+        """
+        Register callback(job) to be called once for every job that reaches a final status.
+        """
+        self.callbacks.append(callback)
+
+    def pending(self):
+        # The condition's lock is reentrant, so this is safe to call while holding it.
+        with self.condition:
+            return [job_id for job_id, job in self.jobs.items()
+                    if job["status"] not in TERMINAL_STATUSES]
+
+    def _fetch(self, job_ids):
+        """
+        Return the latest job descriptions for job_ids, paging list_jobs for large batches
+        and falling back to get_job for anything the listing did not reach.
+        """
+        found = {}
+        wanted = set(job_ids)
+        if len(wanted) >= LIST_JOBS_THRESHOLD:
+            paginator = self.mediaconvert.get_paginator("list_jobs")
+            pages = paginator.paginate(Order="DESCENDING", PaginationConfig={"MaxItems": LIST_JOBS_MAX_ITEMS})
+            for page in pages:
+                for job in page.get("Jobs", []):
+                    if job["Id"] in wanted:
+                        found[job["Id"]] = job
+                if len(found) == len(wanted):
+                    break
+        for job_id in wanted - set(found):
+            found[job_id] = self.mediaconvert.get_job(Id=job_id)["Job"]
+        return found
+
+    def poll_once(self):
+        """
+        Refresh every pending job once. Returns the number of jobs whose status changed.
+        """
+        changed = 0
+        finished = []
+        for job_id, job in self._fetch(self.pending()).items():
+            timing = job.get("Timing", {})
+            with self.condition:
+                record = self.jobs[job_id]
+                if record["status"] != job["Status"]:
+                    changed += 1
+                record["status"] = job["Status"]
+                record["queue_seconds"] = _seconds_between(timing.get("SubmitTime"), timing.get("StartTime"))
+                record["transcode_seconds"] = _seconds_between(timing.get("StartTime"), timing.get("FinishTime"))
+                if job["Status"] == "ERROR":
+                    record["error"] = f"{job.get('ErrorCode')}: {job.get('ErrorMessage')}"
+                if job["Status"] in TERMINAL_STATUSES:
+                    finished.append(dict(record))
+        for record in finished:
+            for callback in self.callbacks:
+                try:
+                    callback(record)
+                except Exception as e:
+                    print(f"Error in completion callback for job {record['id']}: {e}")
+            with self.condition:
+                self.settled.add(record["id"])
+                self.condition.notify_all()
+        return changed
+
+    def next_interval(self, interval, changed):
+        """
+        Poll quickly while jobs are moving, back off (doubling) while they sit in the queue.
+        """
+        return self.min_interval if changed else min(self.max_interval, interval * 2)
+
+    def _run(self):
+        interval = self.min_interval
+        while not self.stopped.is_set():
+            if self.pending():
+                try:
+                    changed = self.poll_once()
+                except Exception as e:
+                    print(f"Error polling MediaConvert jobs: {e}")
+                    changed = 0
+                interval = self.next_interval(interval, changed)
+            self.stopped.wait(interval)
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def wait_all(self, timeout=None):
+        """
+        Block until every tracked job has finished and return the job records.
+        Raises TimeoutError if jobs are still running after 'timeout' seconds.
+        """
+        self.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while len(self.settled) < len(self.jobs):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"{len(self.jobs) - len(self.settled)} MediaConvert jobs still running.")
+                self.condition.wait(remaining)
+            return dict(self.jobs)
+
+    def report(self):
+        """
+        Print and return per-job queue time, transcode time and failure reason.
+        """
+        with self.condition:
+            jobs = [dict(job) for job in self.jobs.values()]
+        for job in jobs:
+            line = (f"Job {job['id']} ({job['input_key']}): {job['status']}, "
+                    f"queued {job['queue_seconds']}s, transcoded {job['transcode_seconds']}s")
+            if job["error"]:
+                line += f", error {job['error']}"
+            print(line)
+        return jobs
@@ -1,98 +1,350 @@
 # mediaconvert_process.py
 import json
+import posixpath
+import random
+import time
 import boto3
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 
 from config import (
     AWS_REGION,
     MEDIACONVERT_ENDPOINT,
     MEDIACONVERT_ROLE_ARN,
-    S3_BUCKET_NAME
+    MEDIACONVERT_CONCURRENCY,
+    MEDIACONVERT_MAX_RETRIES,
+    S3_BUCKET_NAME,
+    OUTPUT_KEY_PREFIX,
+    PROCESSED_KEY_PREFIX,
+    OUTPUT_FORMAT,
+    ABR_LADDER,
+    QVBR_QUALITY_LEVEL,
+    SEGMENT_LENGTH,
+    AUDIO_BITRATE
 )
 
-def create_job():
+# Error codes MediaConvert returns when we submit jobs faster than the account allows.
+THROTTLE_ERRORS = {"TooManyRequestsException", "ThrottlingException", "LimitExceededException"}
+
+def get_mediaconvert_client():
+    return boto3.client(
+        "mediaconvert",
+        region_name=AWS_REGION,
+        endpoint_url=MEDIACONVERT_ENDPOINT
+    )
+
+def parse_ladder(spec):
     """
-    Create a MediaConvert job to process a video.
+    Parse an ABR ladder spec ("HEIGHT:MAX_BITRATE,...") into renditions, largest first.
+    Only the height is used; the width follows the input's aspect ratio. The older
+    "WIDTHxHEIGHT:MAX_BITRATE" form is still accepted and its width ignored.
     """
-    try:
-        mediaconvert = boto3.client(
-            "mediaconvert",
-            region_name=AWS_REGION,
-            endpoint_url=MEDIACONVERT_ENDPOINT
-        )
-
-        input_s3_url = f"s3://{S3_BUCKET_NAME}/videos/first_video.mp4"
-        output_s3_url = f"s3://{S3_BUCKET_NAME}/processed_videos/"
-
-        job_settings = {
-            "Inputs": [
-                {
-                    "AudioSelectors": {
-                        "Audio Selector 1": {"DefaultSelection": "DEFAULT"}
-                    },
-                    "FileInput": input_s3_url,
-                    "VideoSelector": {}
-                }
-            ],
-            "OutputGroups": [
-                {
-                    "Name": "File Group",
-                    "OutputGroupSettings": {
-                        "Type": "FILE_GROUP_SETTINGS",
-                        "FileGroupSettings": {
-                            "Destination": output_s3_url
+    ladder = []
+    for entry in spec.split(","):
+        size, max_bitrate = entry.strip().split(":")
+        height = size.lower().split("x")[-1].rstrip("p")
+        ladder.append({"height": int(height), "max_bitrate": int(max_bitrate)})
+    return sorted(ladder, key=lambda rendition: rendition["height"], reverse=True)
+
+def _input(input_s3_url):
+    return {
+        "AudioSelectors": {
+            "Audio Selector 1": {"DefaultSelection": "DEFAULT"}
+        },
+        "FileInput": input_s3_url,
+        "VideoSelector": {}
+    }
+
+def _audio_description():
+    return {
+        "CodecSettings": {
+            "Codec": "AAC",
+            "AacSettings": {
+                "Bitrate": AUDIO_BITRATE,
+                "CodingMode": "CODING_MODE_2_0",
+                "SampleRate": 48000
+            }
+        }
+    }
+
+def _video_description(rendition):
+    # Width is left out so MediaConvert scales it evenly from the input, keeping the
+    # aspect ratio of non-16:9 sources instead of fitting them into a fixed frame.
+    return {
+        "Height": rendition["height"],
+        "CodecSettings": {
+            "Codec": "H_264",
+            "H264Settings": {
+                "RateControlMode": "QVBR",
+                "QvbrSettings": {"QvbrQualityLevel": QVBR_QUALITY_LEVEL},
+                "MaxBitrate": rendition["max_bitrate"],
+                "QualityTuningLevel": "MULTI_PASS_HQ",
+                "CodecProfile": "HIGH" if rendition["height"] >= 720 else "MAIN",
+                # Keyframes every 2s so every rendition can switch on segment boundaries.
+                "GopSize": 2.0,
+                "GopSizeUnits": "SECONDS",
+                "SceneChangeDetect": "TRANSITION_DETECTION"
+            }
+        },
+        "ScalingBehavior": "DEFAULT",
+        "TimecodeInsertion": "DISABLED"
+    }
+
+def _name_modifier(rendition):
+    return f"_{rendition['height']}p"
+
+def _mp4_group(output_s3_url):
+    # The original single-rendition output: one H.264 CBR 5 Mbps MP4.
+    return {
+        "Name": "File Group",
+        "OutputGroupSettings": {
+            "Type": "FILE_GROUP_SETTINGS",
+            "FileGroupSettings": {
+                "Destination": output_s3_url
+            }
+        },
+        "Outputs": [
+            {
+                "ContainerSettings": {
+                    "Container": "MP4",
+                    "Mp4Settings": {}
+                },
+                "VideoDescription": {
+                    "CodecSettings": {
+                        "Codec": "H_264",
+                        "H264Settings": {
+                            "Bitrate": 5000000,
+                            "RateControlMode": "CBR",
+                            "QualityTuningLevel": "SINGLE_PASS",
+                            "CodecProfile": "MAIN"
                         }
                     },
-                    "Outputs": [
-                        {
-                            "ContainerSettings": {
-                                "Container": "MP4",
-                                "Mp4Settings": {}
-                            },
-                            "VideoDescription": {
-                                "CodecSettings": {
-                                    "Codec": "H_264",
-                                    "H264Settings": {
-                                        "Bitrate": 5000000,
-                                        "RateControlMode": "CBR",
-                                        "QualityTuningLevel": "SINGLE_PASS",
-                                        "CodecProfile": "MAIN"
-                                    }
-                                },
-                                "ScalingBehavior": "DEFAULT",
-                                "TimecodeInsertion": "DISABLED"
-                            },
-                            "AudioDescriptions": [
-                                {
-                                    "CodecSettings": {
-                                        "Codec": "AAC",
-                                        "AacSettings": {
-                                            "Bitrate": 64000,
-                                            "CodingMode": "CODING_MODE_2_0",
-                                            "SampleRate": 48000
-                                        }
-                                    }
-                                }
-                            ]
+                    "ScalingBehavior": "DEFAULT",
+                    "TimecodeInsertion": "DISABLED"
+                },
+                "AudioDescriptions": [
+                    {
+                        "CodecSettings": {
+                            "Codec": "AAC",
+                            "AacSettings": {
+                                "Bitrate": 64000,
+                                "CodingMode": "CODING_MODE_2_0",
+                                "SampleRate": 48000
+                            }
                         }
-                    ]
-                }
-            ]
+                    }
+                ]
+            }
+        ]
+    }
+
+def _hls_group(output_s3_url, ladder):
+    # Each HLS rendition carries its own muxed audio track.
+    return {
+        "Name": "Apple HLS",
+        "OutputGroupSettings": {
+            "Type": "HLS_GROUP_SETTINGS",
+            "HlsGroupSettings": {
+                "Destination": output_s3_url,
+                "SegmentLength": SEGMENT_LENGTH,
+                "MinSegmentLength": 0,
+                "DirectoryStructure": "SINGLE_DIRECTORY",
+                "ManifestDurationFormat": "INTEGER",
+                "OutputSelection": "MANIFESTS_AND_SEGMENTS",
+                "SegmentControl": "SEGMENTED_FILES"
+            }
+        },
+        "Outputs": [
+            {
+                "NameModifier": _name_modifier(rendition),
+                "ContainerSettings": {"Container": "M3U8", "M3u8Settings": {}},
+                "VideoDescription": _video_description(rendition),
+                "AudioDescriptions": [_audio_description()]
+            }
+            for rendition in ladder
+        ]
+    }
+
+def _cmaf_group(output_s3_url, ladder):
+    # CMAF outputs cannot mix audio and video, so audio gets its own output.
+    outputs = [
+        {
+            "NameModifier": _name_modifier(rendition),
+            "ContainerSettings": {"Container": "CMFC"},
+            "VideoDescription": _video_description(rendition)
         }
+        for rendition in ladder
+    ]
+    outputs.append({
+        "NameModifier": "_audio",
+        "ContainerSettings": {"Container": "CMFC"},
+        "AudioDescriptions": [_audio_description()]
+    })
+    return {
+        "Name": "CMAF",
+        "OutputGroupSettings": {
+            "Type": "CMAF_GROUP_SETTINGS",
+            "CmafGroupSettings": {
+                "Destination": output_s3_url,
+                "SegmentLength": SEGMENT_LENGTH,
+                "FragmentLength": 2,
+                "SegmentControl": "SEGMENTED_FILES",
+                "WriteHlsManifest": "ENABLED",
+                "WriteDashManifest": "ENABLED"
+            }
+        },
+        "Outputs": outputs
+    }
+
+def build_job_settings(input_s3_url, output_s3_url, output_format=None, ladder=None):
+    """
+    Build the MediaConvert job settings for one input video.
+    'output_format' is HLS or CMAF (an ABR ladder, one rendition per 'ladder' entry)
+    or MP4 (the single 5 Mbps file); both default to the configured values.
+    """
+    output_format = (output_format or OUTPUT_FORMAT).upper()
+    ladder = ladder or parse_ladder(ABR_LADDER)
+
+    if output_format == "HLS":
+        group = _hls_group(output_s3_url, ladder)
+    elif output_format == "CMAF":
+        group = _cmaf_group(output_s3_url, ladder)
+    elif output_format == "MP4":
+        group = _mp4_group(output_s3_url)
+    else:
+        raise ValueError(f"Unsupported output format: {output_format}")
 
-        # Top-level parameters
-        response = mediaconvert.create_job(
-            Role=MEDIACONVERT_ROLE_ARN,
-            Settings=job_settings,
-            AccelerationSettings={"Mode": "DISABLED"},
-            StatusUpdateInterval="SECONDS_60",
-            Priority=0
-        )
+    return {
+        "Inputs": [_input(input_s3_url)],
+        "OutputGroups": [group]
+    }
+
+def submit_job(mediaconvert, input_key, max_retries=MEDIACONVERT_MAX_RETRIES):
+    """
+    Submit a MediaConvert job for one input key, backing off and retrying when throttled.
+    Returns the created job; any other error is raised.
+    """
+    input_s3_url = f"s3://{S3_BUCKET_NAME}/{input_key}"
+    output_s3_url = f"s3://{S3_BUCKET_NAME}/{output_prefix(input_key)}"
+
+    for attempt in range(max_retries + 1):
+        try:
+            # Top-level parameters
+            response = mediaconvert.create_job(
+                Role=MEDIACONVERT_ROLE_ARN,
+                Settings=build_job_settings(input_s3_url, output_s3_url),
+                AccelerationSettings={"Mode": "DISABLED"},
+                StatusUpdateInterval="SECONDS_60",
+                Priority=0,
+                UserMetadata={"input_key": input_key}
+            )
+            return response["Job"]
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in THROTTLE_ERRORS or attempt == max_retries:
+                raise
+            delay = min(30, 2 ** attempt) * random.uniform(0.5, 1.0)
+            print(f"MediaConvert throttled on {input_key}, retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+def create_job(input_key="videos/first_video.mp4"):
+    """
+    Create a MediaConvert job to process the video stored at 'input_key'.
+    Returns the created job, or None if the job could not be created.
+    """
+    try:
+        job = submit_job(get_mediaconvert_client(), input_key)
 
         print("MediaConvert job created successfully:")
-        print(json.dumps(response, indent=4, default=str))
+        print(json.dumps(job, indent=4, default=str))
+        return job
 
     except Exception as e:
         print(f"Error creating MediaConvert job: {e}")
 
+def list_objects(s3, prefix):
+    """
+    Return {key: LastModified} for every object under 'prefix'.
+    """
+    objects = {}
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=S3_BUCKET_NAME, Prefix=prefix):
+        objects.update((obj["Key"], obj["LastModified"]) for obj in page.get("Contents", []))
+    return objects
+
+def output_prefix(input_key):
+    """
+    Where the outputs of 'input_key' are written: its full key without the extension,
+    under PROCESSED_KEY_PREFIX, so inputs with the same file name never share outputs.
+    """
+    return f"{PROCESSED_KEY_PREFIX}{posixpath.splitext(input_key)[0]}/"
+
+def processed_input_keys(s3, inputs):
+    """
+    Return the keys in 'inputs' ({key: LastModified}) that already have an output
+    written after the input was last uploaded. An input re-uploaded under the same key
+    is newer than its old outputs, so it is processed again.
+    """
+    newest_output = {}
+    for key, modified in list_objects(s3, PROCESSED_KEY_PREFIX).items():
+        prefix = posixpath.dirname(key) + "/"
+        newest_output[prefix] = max(modified, newest_output.get(prefix, modified))
+    return {
+        key for key, modified in inputs.items()
+        if output_prefix(key) in newest_output and newest_output[output_prefix(key)] >= modified
+    }
+
+def active_input_keys(mediaconvert):
+    """
+    Return the input keys of jobs that are still queued or transcoding.
+    """
+    keys = set()
+    paginator = mediaconvert.get_paginator("list_jobs")
+    for status in ("SUBMITTED", "PROGRESSING"):
+        for page in paginator.paginate(Status=status):
+            for job in page.get("Jobs", []):
+                key = job.get("UserMetadata", {}).get("input_key")
+                if key:
+                    keys.add(key)
+    return keys
+
+def submit_jobs(input_keys=None, concurrency=MEDIACONVERT_CONCURRENCY):
+    """
+    Submit one MediaConvert job per input video, with bounded concurrency.
+    'input_keys' is a manifest of uploaded keys; when omitted, every .mp4 under
+    OUTPUT_KEY_PREFIX is used. Inputs that already have an output newer than their
+    upload (matched on the full input key), or a job still in progress, are skipped. Returns the submitted, skipped and failed keys.
+    """
+    s3 = boto3.client("s3", region_name=AWS_REGION)
+    mediaconvert = get_mediaconvert_client()
+
+    uploaded = list_objects(s3, OUTPUT_KEY_PREFIX)
+    if input_keys is None:
+        input_keys = [key for key in uploaded if key.endswith(".mp4")]
+    processed = processed_input_keys(s3, {key: uploaded[key] for key in input_keys if key in uploaded})
+    active = active_input_keys(mediaconvert)
+
+    summary = {"submitted": {}, "skipped": [], "failed": {}}
+    todo = []
+    for key in input_keys:
+        if key in processed or key in active:
+            summary["skipped"].append(key)
+        else:
+            todo.append(key)
+
+    print(f"Submitting {len(todo)} MediaConvert jobs ({len(summary['skipped'])} already processed or in progress)...")
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(submit_job, mediaconvert, key): key for key in todo}
+        for future, key in futures.items():
+            try:
+                summary["submitted"][key] = future.result()["Id"]
+                print(f"Submitted job {summary['submitted'][key]} for s3://{S3_BUCKET_NAME}/{key}")
+            except Exception as e:
+                summary["failed"][key] = str(e)
+                print(f"Error creating MediaConvert job for {key}: {e}")
+
+    print(f"MediaConvert: {len(summary['submitted'])} submitted, {len(summary['skipped'])} skipped, "
+          f"{len(summary['failed'])} failed.")
+    return summary
+
 if __name__ == "__main__":
-    create_job()
+    submit_jobs()
@@ -1,64 +1,183 @@
 # process_videos.py
+import hashlib
 import json
+import threading
+import time
 import boto3
-import requests
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 
 from config import (
     S3_BUCKET_NAME,
     AWS_REGION,
     INPUT_KEY,
-    OUTPUT_KEY_PREFIX  # Changed from OUTPUT_KEY to a prefix for multiple videos
+    OUTPUT_KEY_PREFIX,  # Changed from OUTPUT_KEY to a prefix for multiple videos
+    VIDEO_CONCURRENCY,
+    MAX_CONNECTIONS_PER_HOST,
+    DEDUP_ENABLED
 )
+from s3_stream import stream_url_to_s3
+from dedup import VideoManifest, source_fingerprint, unversioned_fingerprint, stored_object_matches
 
-def process_videos():
+# One semaphore per video host so a single CDN never sees more than
+# MAX_CONNECTIONS_PER_HOST downloads from us at once.
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+def _host_limit(url):
+    host = urlparse(url).netloc
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(MAX_CONNECTIONS_PER_HOST)
+        return _host_limits[host]
+
+def video_key(record):
     """
-    Fetch the highlights JSON file from S3, iterate over all video URLs, download each video,
-    and upload them back to S3.
+    A stable S3 key for a highlight, so nightly reruns map the same video to the same key.
+    """
+    video_id = record.get("id") or hashlib.sha1(record["url"].encode("utf-8")).hexdigest()[:16]
+    return f"{OUTPUT_KEY_PREFIX}highlight_{video_id}.mp4"
+
+def object_etag(s3, key):
+    return s3.head_object(Bucket=S3_BUCKET_NAME, Key=key)["ETag"]
+
+def save_manifest(manifest):
+    """
+    Save the manifest now, so a crash later in the run keeps what was recorded so far.
+    A failed save is retried with the next video or at the end of the run.
+    """
+    try:
+        manifest.save()
+    except Exception as e:
+        print(f"Error saving video manifest: {e}")
+
+def process_video(s3, index, record, manifest=None):
+    """
+    Stream a single highlight video into S3 and return its result for the run summary.
+    With a manifest, videos already backed up are skipped without downloading ("cached"),
+    and a new URL whose content is already stored is removed again ("duplicate").
+    """
+    video_url = record.get("url")
+    result = {"index": index, "url": video_url, "key": None, "status": "skipped",
+              "bytes": 0, "seconds": 0.0, "error": None}
+    if not video_url:
+        print(f"Record {index} does not contain a video URL. Skipping.")
+        return result
+
+    # Create a stable key for each video (e.g., videos/highlight_<id>.mp4)
+    output_key = video_key(record)
+    result["key"] = output_key
+
+    start = time.monotonic()
+    try:
+        with _host_limit(video_url):
+            fingerprint = source_fingerprint(video_url) if manifest else None
+            unversioned = manifest is not None and fingerprint is None
+            if unversioned:
+                # The server sent nothing to version the video by, so match on the URL and
+                # check that the object we stored for it is still there unchanged.
+                fingerprint = unversioned_fingerprint(video_url)
+            stored = manifest.lookup(fingerprint) if manifest else None
+            if stored and not stored_object_matches(s3, stored):
+                stored = None
+            if stored:
+                result["key"] = stored["key"]
+                result["status"] = "cached"
+                print(f"Video {index} already backed up at s3://{S3_BUCKET_NAME}/{stored['key']}. Skipping.")
+                return result
+
+            print(f"Streaming video {index} to S3 with key: {output_key}...")
+            digest = hashlib.sha256()
+            result["bytes"] = stream_url_to_s3(s3, video_url, S3_BUCKET_NAME, output_key, digest=digest)
+
+        if manifest:
+            sha256 = digest.hexdigest()
+            existing = manifest.find_content(sha256)
+            if existing and existing != output_key:
+                # Same video under a different URL: keep the copy we already have.
+                s3.delete_object(Bucket=S3_BUCKET_NAME, Key=output_key)
+                manifest.forget(output_key)
+                manifest.record(fingerprint, existing, sha256, result["bytes"],
+                                etag=object_etag(s3, existing) if unversioned else None)
+                save_manifest(manifest)
+                result["key"] = existing
+                result["status"] = "duplicate"
+                print(f"Video {index} duplicates s3://{S3_BUCKET_NAME}/{existing}. Removed {output_key}.")
+                return result
+            manifest.record(fingerprint, output_key, sha256, result["bytes"],
+                            etag=object_etag(s3, output_key) if unversioned else None)
+            save_manifest(manifest)
+
+        result["status"] = "uploaded"
+        print(f"Video uploaded successfully ({result['bytes']} bytes): s3://{S3_BUCKET_NAME}/{output_key}")
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+        print(f"Error processing video {index} ({video_url}): {e}")
+    finally:
+        result["seconds"] = round(time.monotonic() - start, 2)
+    return result
+
+def summarize_results(results, elapsed):
+    """
+    Print and return a summary of per-video results.
+    """
+    summary = {
+        "total": len(results),
+        "uploaded": [r for r in results if r["status"] == "uploaded"],
+        "failed": [r for r in results if r["status"] == "failed"],
+        "skipped": [r for r in results if r["status"] == "skipped"],
+        "cached": [r for r in results if r["status"] == "cached"],
+        "duplicate": [r for r in results if r["status"] == "duplicate"],
+        "bytes": sum(r["bytes"] for r in results),
+        "seconds": round(elapsed, 2)
+    }
+    print(
+        f"Processed {summary['total']} videos in {summary['seconds']}s: "
+        f"{len(summary['uploaded'])} uploaded, {len(summary['failed'])} failed, "
+        f"{len(summary['skipped'])} skipped, {len(summary['cached'])} already backed up, "
+        f"{len(summary['duplicate'])} duplicates ({summary['bytes']} bytes)."
+    )
+    for failure in summary["failed"]:
+        print(f"  Failed video {failure['index']} ({failure['url']}): {failure['error']}")
+    return summary
+
+def process_videos(highlights=None, concurrency=VIDEO_CONCURRENCY, dedup=DEDUP_ENABLED):
+    """
+    Stream every highlight video into S3 with a multipart upload, running up to
+    'concurrency' videos at once. The highlights JSON file is read from S3 unless
+    the highlights are passed in directly. With 'dedup', videos recorded in the
+    manifest from earlier runs are not downloaded again. Returns the run summary.
     """
     try:
         s3 = boto3.client("s3", region_name=AWS_REGION)
 
-        # Retrieve the JSON file from S3
-        print("Fetching JSON file from S3...")
-        response = s3.get_object(Bucket=S3_BUCKET_NAME, Key=INPUT_KEY)
-        json_content = response['Body'].read().decode('utf-8')
-        highlights = json.loads(json_content)
+        if highlights is None:
+            # Retrieve the JSON file from S3
+            print("Fetching JSON file from S3...")
+            response = s3.get_object(Bucket=S3_BUCKET_NAME, Key=INPUT_KEY)
+            json_content = response['Body'].read().decode('utf-8')
+            highlights = json.loads(json_content)
 
         # Process each highlight record that has a video URL.
         videos = highlights.get("data", [])
         if not videos:
-            print("No video records found in the JSON file.")
+            print("No video records found in the highlights.")
             return
 
-        for index, record in enumerate(videos):
-            video_url = record.get("url")
-            if not video_url:
-                print(f"Record {index} does not contain a video URL. Skipping.")
-                continue
-
-            print(f"Processing video URL {index}: {video_url}")
-
-            # Download the video
-            print("Downloading video...")
-            video_response = requests.get(video_url, stream=True)
-            video_response.raise_for_status()
-
-            # Prepare the video data (BytesIO is optional here; you can use video_response.content directly)
-            video_data = BytesIO(video_response.content)
-
-            # Create a unique key for each video (e.g., videos/highlight_0.mp4, videos/highlight_1.mp4, etc.)
-            output_key = f"{OUTPUT_KEY_PREFIX}highlight_{index}.mp4"
-
-            # Upload the video to S3
-            print(f"Uploading video to S3 with key: {output_key}...")
-            s3.put_object(
-                Bucket=S3_BUCKET_NAME,
-                Key=output_key,
-                Body=video_data.getvalue(),
-                ContentType="video/mp4"
-            )
-            print(f"Video uploaded successfully: s3://{S3_BUCKET_NAME}/{output_key}")
+        manifest = VideoManifest(s3).load() if dedup else None
+
+        print(f"Processing {len(videos)} videos with concurrency {concurrency}...")
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            futures = [
+                executor.submit(process_video, s3, index, record, manifest)
+                for index, record in enumerate(videos)
+            ]
+            results = [future.result() for future in futures]
+        if manifest:
+            manifest.save()
+        return summarize_results(results, time.monotonic() - start)
 
     except Exception as e:
         print(f"Error during video processing: {e}")
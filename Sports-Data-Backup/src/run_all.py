@@ -2,33 +2,140 @@
 import os
 import subprocess
 import time
+import boto3
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 from config import (
     RETRY_COUNT,
     RETRY_DELAY,
-    WAIT_TIME_BETWEEN_SCRIPTS
+    READY_TIMEOUT,
+    READY_POLL_INTERVAL,
+    S3_BUCKET_NAME,
+    AWS_REGION,
+    PIPELINE_MODE,
+    WAIT_FOR_TRANSCODE,
+    TRANSCODE_TIMEOUT
 )
+from fetch import process_highlights
+from process_videos import process_videos
+from mediaconvert_process import submit_jobs
+from streaming_pipeline import run_streaming_pipeline
+from job_tracker import JobTracker
 
-def run_script(script_name, retries=RETRY_COUNT, delay=RETRY_DELAY):
+def run_stage(name, func, inputs, retries=RETRY_COUNT, delay=RETRY_DELAY):
     """
-    Run a script with retry logic and a delay.
+    Run a pipeline stage in-process, retrying with exponential backoff.
     """
-    attempt = 0
-    while attempt < retries:
+    for attempt in range(1, retries + 1):
         try:
-            print(f"Running {script_name} (attempt {attempt + 1}/{retries})...")
-            subprocess.run(["python", script_name], check=True)
-            print(f"{script_name} completed successfully.")
-            return
-        except subprocess.CalledProcessError as e:
-            print(f"Error running {script_name}: {e}")
-            attempt += 1
+            print(f"Running {name} (attempt {attempt}/{retries})...")
+            result = func(**inputs)
+            print(f"{name} completed successfully.")
+            return result
+        except Exception as e:
+            print(f"Error running {name}: {e}")
             if attempt < retries:
-                print(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
+                backoff = delay * 2 ** (attempt - 1)
+                print(f"Retrying in {backoff} seconds...")
+                time.sleep(backoff)
             else:
-                print(f"{script_name} failed after {retries} attempts.")
-                raise e
+                print(f"{name} failed after {retries} attempts.")
+                raise
+
+def run_pipeline(stages):
+    """
+    Run a DAG of stages, starting each one as soon as all of its dependencies have finished.
+    'stages' maps a stage name to (function, [dependency names]); each function receives its
+    dependencies' results as keyword arguments. Returns the results of all stages.
+    """
+    results = {}
+    running = {}
+    pending = dict(stages)
+    with ThreadPoolExecutor(max_workers=len(stages)) as executor:
+        while pending or running:
+            for name, (func, deps) in list(pending.items()):
+                if all(dep in results for dep in deps):
+                    inputs = {dep: results[dep] for dep in deps}
+                    running[executor.submit(run_stage, name, func, inputs)] = name
+                    del pending[name]
+            if not running:
+                raise RuntimeError(f"Unresolvable stage dependencies: {', '.join(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                # A failed stage stops the pipeline; its dependents never start.
+                results[name] = future.result()
+    return results
+
+def wait_for_objects(keys, timeout=READY_TIMEOUT, interval=READY_POLL_INTERVAL):
+    """
+    Block until every key exists in the S3 bucket, instead of sleeping a fixed time.
+    """
+    s3 = boto3.client("s3", region_name=AWS_REGION)
+    waiter = s3.get_waiter("object_exists")
+    for key in keys:
+        waiter.wait(
+            Bucket=S3_BUCKET_NAME,
+            Key=key,
+            WaiterConfig={"Delay": interval, "MaxAttempts": max(1, timeout // interval)}
+        )
+
+def fetch_stage():
+    highlights = process_highlights()
+    if not highlights:
+        raise RuntimeError("No highlights were fetched.")
+    return highlights
+
+def process_videos_stage(fetch):
+    summary = process_videos(highlights=fetch)
+    if not summary or not (summary["uploaded"] or summary["cached"] or summary["duplicate"]):
+        raise RuntimeError("No videos were uploaded.")
+    return summary
+
+def mediaconvert_stage(process_videos):
+    input_keys = [result["key"] for result in process_videos["uploaded"]]
+    wait_for_objects(input_keys)
+    summary = submit_jobs(input_keys)
+    if summary["failed"]:
+        raise RuntimeError(f"{len(summary['failed'])} MediaConvert jobs were not created.")
+    return summary
+
+def streaming_stage(fetch):
+    summary = run_streaming_pipeline(fetch)
+    if not summary["submitted"] and not summary["cached"]:
+        raise RuntimeError("No MediaConvert jobs were submitted.")
+    return summary
+
+def wait_for_jobs(jobs):
+    """
+    Block until the submitted MediaConvert jobs ({input_key: job_id}) finish and report them.
+    """
+    tracker = JobTracker()
+    for input_key, job_id in jobs.items():
+        tracker.add(job_id, input_key)
+    try:
+        tracker.wait_all(timeout=TRANSCODE_TIMEOUT)
+    finally:
+        tracker.stop()
+    return tracker.report()
+
+def transcode_stage(mediaconvert):
+    return wait_for_jobs(mediaconvert["submitted"])
+
+def streaming_transcode_stage(streaming):
+    return wait_for_jobs({result["key"]: result["job_id"] for result in streaming["submitted"]})
+
+PIPELINE = {
+    "fetch": (fetch_stage, []),
+    "process_videos": (process_videos_stage, ["fetch"]),
+    "mediaconvert": (mediaconvert_stage, ["process_videos"]),
+}
+
+STREAMING_PIPELINE = {
+    "fetch": (fetch_stage, []),
+    "streaming": (streaming_stage, ["fetch"]),
+}
 
 def setup_infrastructure():
     """Create ECS cluster and verify its creation."""
@@ -36,7 +143,7 @@ def setup_infrastructure():
         # Create ECS cluster
         cluster_name = os.getenv("ECS_CLUSTER", "default")
         aws_region = os.getenv("AWS_REGION", "us-east-1")
-        
+
         print(f"Creating ECS cluster: {cluster_name}")
         subprocess.run([
             "aws", "ecs", "create-cluster",
@@ -61,20 +168,18 @@ def main():
         # Step 0: Infrastructure setup
         setup_infrastructure()
 
-        # Step 1: Fetch highlights
-        run_script("fetch.py")
-        print("Waiting for resources to stabilize...")
-        time.sleep(WAIT_TIME_BETWEEN_SCRIPTS)
-
-        # Step 2: Process videos
-        run_script("process_videos.py")
-        print("Waiting for resources to stabilize...")
-        time.sleep(WAIT_TIME_BETWEEN_SCRIPTS)
-
-        # Step 3: MediaConvert processing
-        run_script("mediaconvert_process.py")
+        # Steps 1-3: fetch -> process videos -> MediaConvert, all in this process
+        if PIPELINE_MODE == "streaming":
+            pipeline = dict(STREAMING_PIPELINE)
+            if WAIT_FOR_TRANSCODE:
+                pipeline["transcode"] = (streaming_transcode_stage, ["streaming"])
+        else:
+            pipeline = dict(PIPELINE)
+            if WAIT_FOR_TRANSCODE:
+                pipeline["transcode"] = (transcode_stage, ["mediaconvert"])
+        run_pipeline(pipeline)
 
-        print("All scripts executed successfully.")
+        print("All stages executed successfully.")
     except Exception as e:
         print(f"Pipeline failed: {e}")
 
@@ -0,0 +1,28 @@
+# s3_stream.py
+from config import (
+    UPLOAD_PART_SIZE,
+    UPLOAD_MAX_IN_FLIGHT,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_TIMEOUT
+)
+from http_client import get_session
+from s3_multipart import stream_to_s3
+
+def _hashed(chunks, digest):
+    for chunk in chunks:
+        digest.update(chunk)
+        yield chunk
+
+def stream_url_to_s3(s3, url, bucket, key, content_type="video/mp4", digest=None):
+    """
+    Download a URL and pipe the response body straight into S3 in fixed-size chunks.
+    If 'digest' (a hashlib object) is given, it is updated with the body as it streams.
+    Returns the number of bytes uploaded.
+    """
+    with get_session().get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        chunks = response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE)
+        if digest is not None:
+            chunks = _hashed(chunks, digest)
+        return stream_to_s3(s3, chunks, bucket, key, part_size=UPLOAD_PART_SIZE,
+                            max_in_flight=UPLOAD_MAX_IN_FLIGHT, ContentType=content_type)
@@ -0,0 +1,115 @@
+# streaming_pipeline.py
+import queue
+import threading
+import time
+import boto3
+
+from config import (
+    AWS_REGION,
+    VIDEO_CONCURRENCY,
+    MEDIACONVERT_CONCURRENCY,
+    PIPELINE_QUEUE_SIZE,
+    DEDUP_ENABLED
+)
+from process_videos import process_video
+from dedup import VideoManifest
+from mediaconvert_process import get_mediaconvert_client, submit_job
+
+# Sentinel telling a worker that its input queue is finished.
+_DONE = object()
+
+def _start_workers(count, target, *args):
+    threads = [threading.Thread(target=target, args=args, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def _stop_workers(threads, inbox):
+    for _ in threads:
+        inbox.put(_DONE)
+    for thread in threads:
+        thread.join()
+
+def _upload_worker(s3, manifest, inbox, outbox):
+    while True:
+        item = inbox.get()
+        if item is _DONE:
+            return
+        index, record = item
+        outbox.put(process_video(s3, index, record, manifest))
+
+def _transcode_worker(mediaconvert, inbox, results, state):
+    while True:
+        result = inbox.get()
+        if result is _DONE:
+            return
+        result["job_id"] = None
+        if result["status"] == "uploaded":
+            try:
+                result["job_id"] = submit_job(mediaconvert, result["key"])["Id"]
+                print(f"Submitted job {result['job_id']} for {result['key']}")
+                with state["lock"]:
+                    if state["first_job_at"] is None:
+                        state["first_job_at"] = time.monotonic()
+            except Exception as e:
+                result["error"] = str(e)
+                print(f"Error creating MediaConvert job for {result['key']}: {e}")
+        with state["lock"]:
+            results.append(result)
+
+def run_streaming_pipeline(highlights, upload_workers=VIDEO_CONCURRENCY,
+                           transcode_workers=MEDIACONVERT_CONCURRENCY,
+                           queue_size=PIPELINE_QUEUE_SIZE, dedup=DEDUP_ENABLED):
+    """
+    Move each highlight through download -> upload -> MediaConvert submission on its own.
+    The stages are connected by bounded queues, so a video's transcode job is submitted as
+    soon as its upload finishes instead of after every video has been downloaded.
+    Returns the per-video results and timing summary.
+    """
+    videos = highlights.get("data", [])
+    s3 = boto3.client("s3", region_name=AWS_REGION)
+    # One MediaConvert client is shared by every transcode worker (boto3 clients are thread-safe).
+    mediaconvert = get_mediaconvert_client()
+    manifest = VideoManifest(s3).load() if dedup else None
+    to_upload = queue.Queue(maxsize=queue_size)
+    to_transcode = queue.Queue(maxsize=queue_size)
+    results = []
+    state = {"lock": threading.Lock(), "first_job_at": None}
+
+    print(f"Streaming {len(videos)} videos through {upload_workers} upload and "
+          f"{transcode_workers} transcode workers...")
+    start = time.monotonic()
+    uploaders = _start_workers(max(1, upload_workers), _upload_worker, s3, manifest, to_upload, to_transcode)
+    transcoders = _start_workers(max(1, transcode_workers), _transcode_worker,
+                                 mediaconvert, to_transcode, results, state)
+
+    # put() blocks while the queue is full, so a slow stage throttles the ones before it.
+    for index, record in enumerate(videos):
+        to_upload.put((index, record))
+    _stop_workers(uploaders, to_upload)
+    _stop_workers(transcoders, to_transcode)
+    if manifest:
+        manifest.save()
+
+    results.sort(key=lambda result: result["index"])
+    summary = {
+        "results": results,
+        "uploaded": [r for r in results if r["status"] == "uploaded"],
+        "submitted": [r for r in results if r["job_id"]],
+        # Already in S3 from an earlier run (or under another URL), so not transcoded again.
+        "cached": [r for r in results if r["status"] in ("cached", "duplicate")],
+        "failed": [r for r in results if r["status"] == "failed"
+                   or (r["status"] == "uploaded" and not r["job_id"])],
+        "seconds": round(time.monotonic() - start, 2),
+        "first_job_seconds": None
+    }
+    if state["first_job_at"] is not None:
+        summary["first_job_seconds"] = round(state["first_job_at"] - start, 2)
+
+    print(f"Streaming pipeline finished in {summary['seconds']}s: {len(summary['uploaded'])} uploaded, "
+          f"{len(summary['submitted'])} transcode jobs submitted, {len(summary['cached'])} already backed up, "
+          f"{len(summary['failed'])} failed "
+          f"(first job after {summary['first_job_seconds']}s).")
+    for failure in summary["failed"]:
+        print(f"  Failed video {failure['index']} ({failure['url']}): {failure['error'] or 'job not created'}")
+    return summary
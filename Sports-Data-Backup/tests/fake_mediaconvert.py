@@ -0,0 +1,55 @@
+# fake_mediaconvert.py
+from datetime import datetime, timedelta
+
+START = datetime(2025, 1, 1, 12, 0, 0)
+
+class FakePaginator:
+    def __init__(self, client, page_size):
+        self.client = client
+        self.page_size = page_size
+
+    def paginate(self, Order="DESCENDING", PaginationConfig=None):
+        self.client.calls["list_jobs"] += 1
+        max_items = (PaginationConfig or {}).get("MaxItems")
+        jobs = [self.client.describe(job_id) for job_id in self.client.listed]
+        if max_items is not None:
+            jobs = jobs[:max_items]
+        for start in range(0, len(jobs), self.page_size):
+            yield {"Jobs": jobs[start:start + self.page_size]}
+
+class FakeMediaConvert:
+    """
+    Local stand-in for the MediaConvert client used by JobTracker.
+    Each job walks through its scripted statuses, one step per advance() call;
+    list_jobs only returns the jobs in 'listed' (all of them by default).
+    """
+    def __init__(self, scripts, listed=None, page_size=2):
+        self.scripts = {job_id: list(statuses) for job_id, statuses in scripts.items()}
+        self.steps = {job_id: 0 for job_id in scripts}
+        self.listed = list(scripts) if listed is None else list(listed)
+        self.page_size = page_size
+        self.calls = {"list_jobs": 0, "get_job": []}
+
+    def advance(self):
+        for job_id, statuses in self.scripts.items():
+            self.steps[job_id] = min(self.steps[job_id] + 1, len(statuses) - 1)
+
+    def describe(self, job_id):
+        status = self.scripts[job_id][self.steps[job_id]]
+        job = {"Id": job_id, "Status": status, "Timing": {"SubmitTime": START}}
+        if status != "SUBMITTED":
+            job["Timing"]["StartTime"] = START + timedelta(seconds=30)
+        if status in ("COMPLETE", "ERROR", "CANCELED"):
+            job["Timing"]["FinishTime"] = START + timedelta(seconds=90)
+        if status == "ERROR":
+            job["ErrorCode"] = 1010
+            job["ErrorMessage"] = "Unsupported input"
+        return job
+
+    def get_paginator(self, name):
+        assert name == "list_jobs"
+        return FakePaginator(self, self.page_size)
+
+    def get_job(self, Id):
+        self.calls["get_job"].append(Id)
+        return {"Job": self.describe(Id)}
@@ -0,0 +1,127 @@
+# test_dedup.py
+import io
+import json
+
+from botocore.exceptions import ClientError
+
+from dedup import VideoManifest
+
+def client_error(code):
+    return ClientError({"Error": {"Code": code}}, "PutObject")
+
+class FakeS3:
+    """
+    In-memory S3 holding a single manifest object, with ETags and the
+    If-Match / If-None-Match conditions of put_object.
+    """
+    def __init__(self):
+        self.body = None
+        self.version = 0
+        self.puts = 0
+
+    def etag(self):
+        return f'"{self.version}"'
+
+    def get_object(self, Bucket, Key):
+        if self.body is None:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.body.encode("utf-8")), "ETag": self.etag()}
+
+    def put_object(self, Bucket, Key, Body, ContentType, IfMatch=None, IfNoneMatch=None):
+        if IfNoneMatch == "*" and self.body is not None:
+            raise client_error("PreconditionFailed")
+        if IfMatch is not None and IfMatch != self.etag():
+            raise client_error("PreconditionFailed")
+        self.body = Body
+        self.version += 1
+        self.puts += 1
+        return {"ETag": self.etag()}
+
+    def manifest(self):
+        return json.loads(self.body)
+
+def test_save_creates_the_manifest_and_skips_when_nothing_changed():
+    s3 = FakeS3()
+    manifest = VideoManifest(s3).load()
+    manifest.record("url-a", "videos/a.mp4", "hash-a", 10)
+    manifest.save()
+    manifest.save()
+
+    assert s3.puts == 1
+    assert s3.manifest()["hashes"] == {"hash-a": "videos/a.mp4"}
+
+def test_concurrent_runs_merge_instead_of_overwriting():
+    s3 = FakeS3()
+    first = VideoManifest(s3).load()
+    second = VideoManifest(s3).load()
+    first.record("url-a", "videos/a.mp4", "hash-a", 10)
+    second.record("url-b", "videos/b.mp4", "hash-b", 20)
+
+    first.save()
+    second.save()  # Conflicts with the first save, reloads and replays
+
+    assert set(s3.manifest()["sources"]) == {"url-a", "url-b"}
+    assert s3.manifest()["hashes"] == {"hash-a": "videos/a.mp4", "hash-b": "videos/b.mp4"}
+    assert second.pending == []
+
+def test_re_recording_a_key_drops_entries_for_its_old_content():
+    manifest = VideoManifest(FakeS3())
+    manifest.record("url-a", "videos/a.mp4", "old-hash", 10)
+    manifest.record("url-a2", "videos/a.mp4", "new-hash", 12)
+
+    assert manifest.find_content("old-hash") is None
+    assert manifest.lookup("url-a") is None
+    assert manifest.find_content("new-hash") == "videos/a.mp4"
+
+def test_forget_removes_every_entry_for_a_deleted_key():
+    manifest = VideoManifest(FakeS3())
+    manifest.record("url-a", "videos/a.mp4", "hash-a", 10)
+    manifest.record("url-b", "videos/b.mp4", "hash-b", 20)
+    manifest.forget("videos/b.mp4")
+
+    assert manifest.lookup("url-b") is None
+    assert manifest.find_content("hash-b") is None
+    assert manifest.find_content("hash-a") == "videos/a.mp4"
+
+class FakeBucket(FakeS3):
+    """
+    FakeS3 that also stores the uploaded videos, for process_video.
+    """
+    def __init__(self):
+        super().__init__()
+        self.objects = {}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {"ETag": self.objects[Key]}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+def test_unversioned_source_is_not_downloaded_again(monkeypatch):
+    import process_videos
+
+    downloads = []
+    def fake_stream(s3, url, bucket, key, digest=None):
+        downloads.append(url)
+        digest.update(b"video")
+        s3.objects[key] = f'"etag-{len(downloads)}"'
+        return 5
+
+    # The server sends no ETag or Content-Length.
+    monkeypatch.setattr(process_videos, "source_fingerprint", lambda url: None)
+    monkeypatch.setattr(process_videos, "stream_url_to_s3", fake_stream)
+    s3 = FakeBucket()
+    record = {"id": "a", "url": "https://cdn.example/a.mp4"}
+
+    first = process_videos.process_video(s3, 0, record, VideoManifest(s3).load())
+    second = process_videos.process_video(s3, 0, record, VideoManifest(s3).load())
+    assert (first["status"], second["status"]) == ("uploaded", "cached")
+    assert len(downloads) == 1
+
+    # The stored object was replaced outside the pipeline, so it is fetched again.
+    s3.objects[first["key"]] = '"changed"'
+    third = process_videos.process_video(s3, 0, record, VideoManifest(s3).load())
+    assert third["status"] == "uploaded"
+    assert len(downloads) == 2
@@ -0,0 +1,132 @@
+# test_job_tracker.py
+import threading
+
+import pytest
+
+import job_tracker
+from fake_mediaconvert import FakeMediaConvert
+from job_tracker import JobTracker
+
+class RecordingEvent:
+    """
+    Stands in for the tracker's stop event: records each wait interval, advances the
+    fake jobs one step instead of sleeping, and stops the loop after 'waits' waits.
+    """
+    def __init__(self, client, waits):
+        self.client = client
+        self.waits = waits
+        self.intervals = []
+        self.event = threading.Event()
+
+    def is_set(self):
+        return self.event.is_set()
+
+    def wait(self, interval):
+        self.intervals.append(interval)
+        self.client.advance()
+        if len(self.intervals) >= self.waits:
+            self.event.set()
+
+def make_tracker(client, **kwargs):
+    kwargs.setdefault("min_interval", 1)
+    kwargs.setdefault("max_interval", 8)
+    return JobTracker(mediaconvert=client, **kwargs)
+
+def test_next_interval_doubles_up_to_max_and_resets_on_change():
+    tracker = make_tracker(FakeMediaConvert({}))
+    interval = tracker.min_interval
+    intervals = []
+    for _ in range(5):
+        interval = tracker.next_interval(interval, changed=0)
+        intervals.append(interval)
+    assert intervals == [2, 4, 8, 8, 8]
+    assert tracker.next_interval(interval, changed=1) == 1
+
+def test_poll_loop_backs_off_while_queued_and_resets_when_jobs_move():
+    client = FakeMediaConvert({
+        "job-1": ["SUBMITTED", "SUBMITTED", "SUBMITTED", "PROGRESSING", "PROGRESSING", "COMPLETE"]
+    })
+    tracker = make_tracker(client)
+    tracker.add("job-1", "videos/a.mp4")
+    tracker.stopped = RecordingEvent(client, waits=7)
+
+    tracker._run()
+
+    # Three unchanged polls back off, PROGRESSING resets, COMPLETE resets again,
+    # and with nothing pending the last interval is kept.
+    assert tracker.stopped.intervals == [2, 4, 8, 1, 2, 1, 1]
+    assert tracker.jobs["job-1"]["status"] == "COMPLETE"
+
+def test_small_batches_use_get_job_only():
+    client = FakeMediaConvert({"job-1": ["PROGRESSING"], "job-2": ["SUBMITTED"]})
+    tracker = make_tracker(client)
+    tracker.add("job-1")
+    tracker.add("job-2")
+
+    assert tracker.poll_once() == 1
+    assert client.calls["list_jobs"] == 0
+    assert sorted(client.calls["get_job"]) == ["job-1", "job-2"]
+
+def test_large_batches_page_list_jobs_and_fall_back_to_get_job():
+    job_ids = [f"job-{n}" for n in range(job_tracker.LIST_JOBS_THRESHOLD + 1)]
+    # The last two jobs are beyond what list_jobs returns.
+    client = FakeMediaConvert({job_id: ["PROGRESSING"] for job_id in job_ids}, listed=job_ids[:-2])
+    tracker = make_tracker(client)
+    for job_id in job_ids:
+        tracker.add(job_id)
+
+    tracker.poll_once()
+
+    assert client.calls["list_jobs"] == 1
+    assert sorted(client.calls["get_job"]) == sorted(job_ids[-2:])
+    assert all(job["status"] == "PROGRESSING" for job in tracker.jobs.values())
+
+def test_callbacks_fire_once_per_finished_job_with_timings_and_errors():
+    client = FakeMediaConvert({
+        "job-ok": ["PROGRESSING", "COMPLETE"],
+        "job-bad": ["ERROR"]
+    })
+    tracker = make_tracker(client)
+    tracker.add("job-ok", "videos/ok.mp4")
+    tracker.add("job-bad", "videos/bad.mp4")
+    finished = []
+
+    def failing_callback(job):
+        raise RuntimeError("callback failure must not stop the others")
+
+    tracker.on_complete(failing_callback)
+    tracker.on_complete(finished.append)
+
+    tracker.poll_once()
+    assert [job["id"] for job in finished] == ["job-bad"]
+    assert finished[0]["error"] == "1010: Unsupported input"
+
+    client.advance()
+    tracker.poll_once()
+    tracker.poll_once()  # Finished jobs are not polled or reported again
+    assert [job["id"] for job in finished] == ["job-bad", "job-ok"]
+    assert finished[1]["queue_seconds"] == 30.0
+    assert finished[1]["transcode_seconds"] == 60.0
+    assert tracker.settled == {"job-ok", "job-bad"}
+
+def test_wait_all_returns_every_job_once_finished():
+    client = FakeMediaConvert({"job-1": ["COMPLETE"], "job-2": ["CANCELED"]})
+    tracker = make_tracker(client, min_interval=0.01, max_interval=0.01)
+    tracker.add("job-1")
+    tracker.add("job-2")
+    try:
+        jobs = tracker.wait_all(timeout=5)
+    finally:
+        tracker.stop()
+    assert {job_id: job["status"] for job_id, job in jobs.items()} == {"job-1": "COMPLETE", "job-2": "CANCELED"}
+
+def test_wait_all_raises_timeout_while_jobs_are_still_running():
+    client = FakeMediaConvert({"job-1": ["COMPLETE"], "job-2": ["PROGRESSING"]})
+    tracker = make_tracker(client, min_interval=0.01, max_interval=0.02)
+    tracker.add("job-1")
+    tracker.add("job-2")
+    try:
+        with pytest.raises(TimeoutError, match="1 MediaConvert jobs still running"):
+            tracker.wait_all(timeout=0.2)
+    finally:
+        tracker.stop()
@@ -0,0 +1,109 @@
+# test_mediaconvert_settings.py
+import pytest
+
+import mediaconvert_process
+from mediaconvert_process import build_job_settings, parse_ladder
+
+INPUT = "s3://bucket/videos/highlight_1.mp4"
+OUTPUT = "s3://bucket/processed_videos/videos/highlight_1/"
+LADDER = parse_ladder("720:3500000,1080:6000000,360:800000")
+
+def video_outputs(group):
+    return [output for output in group["Outputs"] if "VideoDescription" in output]
+
+def test_parse_ladder_sorts_largest_first():
+    assert parse_ladder("360:800000, 1080:6000000,720p:3500000") == [
+        {"height": 1080, "max_bitrate": 6000000},
+        {"height": 720, "max_bitrate": 3500000},
+        {"height": 360, "max_bitrate": 800000}
+    ]
+
+def test_parse_ladder_accepts_width_x_height_and_ignores_width():
+    assert parse_ladder("1280x720:3500000") == [{"height": 720, "max_bitrate": 3500000}]
+
+def test_parse_ladder_rejects_malformed_entries():
+    with pytest.raises(ValueError):
+        parse_ladder("1080")
+
+def test_hls_has_one_muxed_output_per_rendition():
+    settings = build_job_settings(INPUT, OUTPUT, output_format="hls", ladder=LADDER)
+
+    assert settings["Inputs"][0]["FileInput"] == INPUT
+    [group] = settings["OutputGroups"]
+    assert group["OutputGroupSettings"]["Type"] == "HLS_GROUP_SETTINGS"
+    assert group["OutputGroupSettings"]["HlsGroupSettings"]["Destination"] == OUTPUT
+    assert [output["NameModifier"] for output in group["Outputs"]] == ["_1080p", "_720p", "_360p"]
+    for output in group["Outputs"]:
+        assert output["ContainerSettings"]["Container"] == "M3U8"
+        assert len(output["AudioDescriptions"]) == 1
+
+def test_cmaf_puts_audio_in_its_own_output():
+    settings = build_job_settings(INPUT, OUTPUT, output_format="CMAF", ladder=LADDER)
+
+    [group] = settings["OutputGroups"]
+    cmaf = group["OutputGroupSettings"]["CmafGroupSettings"]
+    assert group["OutputGroupSettings"]["Type"] == "CMAF_GROUP_SETTINGS"
+    assert cmaf["WriteHlsManifest"] == "ENABLED"
+    assert cmaf["WriteDashManifest"] == "ENABLED"
+    assert len(video_outputs(group)) == len(LADDER)
+    assert all("AudioDescriptions" not in output for output in video_outputs(group))
+    audio = group["Outputs"][-1]
+    assert audio["NameModifier"] == "_audio"
+    assert "VideoDescription" not in audio
+
+@pytest.mark.parametrize("output_format", ["HLS", "CMAF"])
+def test_renditions_use_qvbr_with_the_ladder_max_bitrate(monkeypatch, output_format):
+    monkeypatch.setattr(mediaconvert_process, "QVBR_QUALITY_LEVEL", 8)
+    settings = build_job_settings(INPUT, OUTPUT, output_format=output_format, ladder=LADDER)
+
+    outputs = video_outputs(settings["OutputGroups"][0])
+    for rendition, output in zip(LADDER, outputs):
+        h264 = output["VideoDescription"]["CodecSettings"]["H264Settings"]
+        assert h264["RateControlMode"] == "QVBR"
+        assert h264["QvbrSettings"] == {"QvbrQualityLevel": 8}
+        assert h264["MaxBitrate"] == rendition["max_bitrate"]
+        assert "Bitrate" not in h264
+
+@pytest.mark.parametrize("output_format", ["HLS", "CMAF"])
+def test_renditions_set_height_only_to_keep_the_aspect_ratio(output_format):
+    settings = build_job_settings(INPUT, OUTPUT, output_format=output_format, ladder=LADDER)
+
+    for rendition, output in zip(LADDER, video_outputs(settings["OutputGroups"][0])):
+        assert output["VideoDescription"]["Height"] == rendition["height"]
+        assert "Width" not in output["VideoDescription"]
+
+@pytest.mark.parametrize("output_format, settings_key", [
+    ("HLS", "HlsGroupSettings"),
+    ("CMAF", "CmafGroupSettings")
+])
+def test_segment_length_comes_from_config(monkeypatch, output_format, settings_key):
+    monkeypatch.setattr(mediaconvert_process, "SEGMENT_LENGTH", 4)
+    settings = build_job_settings(INPUT, OUTPUT, output_format=output_format, ladder=LADDER)
+
+    group_settings = settings["OutputGroups"][0]["OutputGroupSettings"][settings_key]
+    assert group_settings["SegmentLength"] == 4
+    # Keyframes every 2s line up with any whole-second segment length.
+    for output in video_outputs(settings["OutputGroups"][0]):
+        assert output["VideoDescription"]["CodecSettings"]["H264Settings"]["GopSize"] == 2.0
+
+def test_mp4_keeps_the_single_cbr_rendition():
+    settings = build_job_settings(INPUT, OUTPUT, output_format="MP4")
+
+    [output] = settings["OutputGroups"][0]["Outputs"]
+    h264 = output["VideoDescription"]["CodecSettings"]["H264Settings"]
+    assert output["ContainerSettings"]["Container"] == "MP4"
+    assert h264["RateControlMode"] == "CBR"
+    assert h264["Bitrate"] == 5000000
+
+def test_defaults_come_from_config(monkeypatch):
+    monkeypatch.setattr(mediaconvert_process, "OUTPUT_FORMAT", "CMAF")
+    monkeypatch.setattr(mediaconvert_process, "ABR_LADDER", "480:1500000")
+    settings = build_job_settings(INPUT, OUTPUT)
+
+    group = settings["OutputGroups"][0]
+    assert group["Name"] == "CMAF"
+    assert [output["NameModifier"] for output in group["Outputs"]] == ["_480p", "_audio"]
+
+def test_unknown_output_format_is_rejected():
+    with pytest.raises(ValueError, match="Unsupported output format"):
+        build_job_settings(INPUT, OUTPUT, output_format="DASH", ladder=LADDER)
@@ -0,0 +1,87 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# This module is copied unchanged into every project that uses requests.
+# Per-project defaults go in that project's config.py as HTTP_SETTINGS, not in this file.
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Environment variable -> (default, type). The environment always wins over config.py.
+SETTINGS = {
+    "HTTP_POOL_SIZE": (10, int),         # keep-alive connections kept per host
+    "HTTP_MAX_RETRIES": (3, int),        # retries after a connection error or a 429/5xx
+    "HTTP_BACKOFF_FACTOR": (0.5, float), # base delay (seconds) of the exponential backoff
+    "HTTP_TIMEOUT": (10, float)          # seconds, for requests that do not set their own
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _project_settings():
+    # Projects with a config.py may set HTTP_SETTINGS = {"HTTP_TIMEOUT": 300, ...}
+    try:
+        import config
+    except ImportError:
+        return {}
+    return getattr(config, "HTTP_SETTINGS", {})
+
+
+def setting(name):
+    # Read when the session is built, so values loaded from a .env file after import still apply
+    default, cast = SETTINGS[name]
+    value = os.getenv(name)
+    if value is None:
+        value = _project_settings().get(name, default)
+    return cast(value)
+
+
+class TimeoutSession(requests.Session):
+    """Session that applies a default timeout to every request."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def build_session(pool_size=None, max_retries=None, backoff_factor=None, timeout=None):
+    """Build a keep-alive session with a connection pool and retry/backoff policy; unset arguments come from SETTINGS."""
+    if pool_size is None:
+        pool_size = setting("HTTP_POOL_SIZE")
+    if max_retries is None:
+        max_retries = setting("HTTP_MAX_RETRIES")
+    if backoff_factor is None:
+        backoff_factor = setting("HTTP_BACKOFF_FACTOR")
+    if timeout is None:
+        timeout = setting("HTTP_TIMEOUT")
+
+    # Only GET/HEAD are retried; the last response is returned so raise_for_status() still applies
+    retries = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session = TimeoutSession(timeout)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """Return the session shared by the whole process, so TLS handshakes are paid once per host."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = build_session()
+        return _session
@@ -5,6 +5,8 @@ import requests
 from datetime import datetime
 from dotenv import load_dotenv
 
+from http_client import get_session
+
 # Load environment variables
 load_dotenv()
 
@@ -38,7 +40,7 @@ class WeatherDashboard:
         }
         
         try:
-            response = requests.get(base_url, params=params)
+            response = get_session().get(base_url, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
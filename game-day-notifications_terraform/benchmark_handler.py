@@ -0,0 +1,147 @@
+"""
+Local cold vs warm latency benchmark for the NBA notification Lambda handlers.
+
+boto3 and urllib3 are replaced with stubs that sleep for a configurable time, so the
+numbers show how much client construction, SSM and HTTP work each invocation does,
+not real AWS latency. Nothing is sent to AWS or the SportsData.io API.
+
+    python benchmark_handler.py
+    python benchmark_handler.py ../Games_day_Notification/source/nba_games_notification.py --warm 50
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+SAMPLE_GAMES = [
+    {"GameID": 1, "Status": "Final", "AwayTeam": "BOS", "HomeTeam": "NY", "AwayTeamScore": 110, "HomeTeamScore": 104,
+     "DateTime": "2025-01-10T19:30:00", "Channel": "ESPN",
+     "Quarters": [{"Number": 1, "AwayScore": 28, "HomeScore": 25}]},
+    {"GameID": 2, "Status": "Scheduled", "AwayTeam": "LAL", "HomeTeam": "GS", "DateTime": "2025-01-10T22:00:00", "Channel": "TNT"}
+]
+
+
+def stub_modules(args, counters):
+    """Build stand-ins for boto3 and urllib3 that count calls and sleep like the real thing."""
+    def pause(ms):
+        time.sleep(ms / 1000.0)
+
+    class StubAWSClient:
+        def __init__(self, service):
+            counters["clients"] += 1
+            pause(args.client_ms)
+
+        def get_parameter(self, **kwargs):
+            counters["ssm_calls"] += 1
+            pause(args.ssm_ms)
+            return {"Parameter": {"Value": "benchmark-key"}}
+
+        def publish_batch(self, PublishBatchRequestEntries, **kwargs):
+            counters["sns_calls"] += 1
+            pause(args.sns_ms)
+            return {"Successful": [{"Id": entry["Id"]} for entry in PublishBatchRequestEntries], "Failed": []}
+
+    boto3 = types.ModuleType("boto3")
+    boto3.client = lambda service, **kwargs: StubAWSClient(service)
+
+    class StubResponse:
+        def __init__(self, status):
+            self.status = status
+            self.data = json.dumps(SAMPLE_GAMES).encode() if status == 200 else b""
+            self.headers = {"ETag": '"benchmark"'}
+
+    class StubPoolManager:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def request(self, method, url, **kwargs):
+            counters["http_calls"] += 1
+            pause(args.http_ms)
+            not_modified = (kwargs.get("headers") or {}).get("If-None-Match") == '"benchmark"'
+            return StubResponse(304 if not_modified else 200)
+
+    urllib3 = types.ModuleType("urllib3")
+    urllib3.PoolManager = StubPoolManager
+    urllib3.Timeout = lambda **kwargs: None
+    urllib3.Retry = lambda **kwargs: None
+    return {"boto3": boto3, "urllib3": urllib3}
+
+
+def load_handler(path, modules, import_ms):
+    """Import the handler module from scratch, as a new Lambda container would."""
+    for name, module in modules.items():
+        sys.modules[name] = module
+    # Each handler imports the nba_common.py that sits next to it
+    sys.modules.pop("nba_common", None)
+    handler_dir = os.path.dirname(os.path.abspath(path))
+    if handler_dir in sys.path:
+        sys.path.remove(handler_dir)
+    sys.path.insert(0, handler_dir)
+    spec = importlib.util.spec_from_file_location("benchmarked_handler", path)
+    handler_module = importlib.util.module_from_spec(spec)
+    time.sleep(import_ms / 1000.0)  # Stands in for loading the real boto3 package
+    spec.loader.exec_module(handler_module)
+    return handler_module
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nba_notifications.py")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("handler", nargs="?", default=default_path, help="Lambda source file to benchmark")
+    parser.add_argument("--cold", type=int, default=5, help="number of simulated cold starts")
+    parser.add_argument("--warm", type=int, default=20, help="warm invocations after each cold start")
+    parser.add_argument("--import-ms", type=float, default=150, help="simulated boto3 import time")
+    parser.add_argument("--client-ms", type=float, default=40, help="simulated boto3 client construction time")
+    parser.add_argument("--ssm-ms", type=float, default=25, help="simulated SSM get_parameter latency")
+    parser.add_argument("--sns-ms", type=float, default=20, help="simulated SNS publish latency")
+    parser.add_argument("--http-ms", type=float, default=30, help="simulated SportsData.io latency")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SNS_TOPIC_ARN", "arn:aws:sns:us-east-1:000000000000:benchmark")
+    os.environ.setdefault("SPORTS_DATA_API_KEY", "benchmark-key")
+    state_dir = tempfile.mkdtemp()
+
+    cold_times, warm_times = [], []
+    counters = {"clients": 0, "ssm_calls": 0, "sns_calls": 0, "http_calls": 0}
+    real_stdout = sys.stdout
+    for _ in range(args.cold):
+        modules = stub_modules(args, counters)
+        # Each cold start gets fresh game state, like a first deployment
+        os.environ["STATE_FILE"] = os.path.join(state_dir, f"state_{len(cold_times)}.json")
+        os.environ["HTTP_CACHE_FILE"] = os.path.join(state_dir, f"http_cache_{len(cold_times)}.json")
+        sys.stdout = open(os.devnull, "w")  # The handlers print every message they publish
+        try:
+            start = time.perf_counter()
+            handler = load_handler(args.handler, modules, args.import_ms).lambda_handler
+            handler({}, None)
+            cold_times.append((time.perf_counter() - start) * 1000)
+            warm_times.extend(timed(lambda: handler({}, None)) for _ in range(args.warm))
+        finally:
+            sys.stdout.close()
+            sys.stdout = real_stdout
+
+    invocations = args.cold * (args.warm + 1)
+    print(f"Handler: {args.handler}")
+    print(f"Cold start (init + first invocation): median {statistics.median(cold_times):.1f} ms")
+    if warm_times:
+        print(f"Warm invocation: median {statistics.median(warm_times):.1f} ms, "
+              f"max {max(warm_times):.1f} ms")
+    print(f"Per invocation: {counters['clients'] / invocations:.2f} client constructions, "
+          f"{counters['ssm_calls'] / invocations:.2f} SSM calls, "
+          f"{counters['http_calls'] / invocations:.2f} API calls, "
+          f"{counters['sns_calls'] / invocations:.2f} SNS publish calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,18 @@ resource "aws_sns_topic" "nba_game_alerts" {
   name = "nba_game_alerts"
 }
 
+# DynamoDB Table holding the last-seen state of each game, so only changes are published
+resource "aws_dynamodb_table" "nba_game_state" {
+  name         = "nba_game_state"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "GameID"
+
+  attribute {
+    name = "GameID"
+    type = "N"
+  }
+}
+
 # IAM Role for Lambda
 resource "aws_iam_role" "lambda_role" {
   name = "nba_lambda_role"
@@ -82,6 +94,35 @@ resource "aws_iam_role_policy_attachment" "attach_read_param_store" {
 }
 
 
+# IAM Policy to Read and Write Game State
+resource "aws_iam_policy" "game_state_policy" {
+  name        = "nba_game_state_access"
+  description = "Allow Lambda to read and write the last-seen game state"
+
+  policy = <<EOF
+{
+  "Version": "2012-10-17",
+  "Statement": [
+    {
+      "Effect": "Allow",
+      "Action": [
+        "dynamodb:BatchGetItem",
+        "dynamodb:PutItem"
+      ],
+      "Resource": "${aws_dynamodb_table.nba_game_state.arn}"
+    }
+  ]
+}
+EOF
+}
+
+# Attach IAM Policy for Game State to IAM Role
+resource "aws_iam_role_policy_attachment" "attach_game_state" {
+  role       = aws_iam_role.lambda_role.name
+  policy_arn = aws_iam_policy.game_state_policy.arn
+}
+
+
 # IAM Policy for CloudWatch Logs (Lambda Execution)
 resource "aws_iam_policy" "lambda_logging" {
   name        = "lambda_logging_policy"
@@ -113,15 +154,17 @@ resource "aws_iam_role_policy_attachment" "attach_logging" {
 
 # Lambda Function
 resource "aws_lambda_function" "nba_lambda" {
-  filename      = "nba_notifications.zip" # Pre-packaged ZIP
+  filename      = "nba_notifications.zip" # Pre-packaged ZIP with nba_notifications.py, nba_common.py and live_poller.py
   function_name = "nba_game_alerts"
   role          = aws_iam_role.lambda_role.arn
   handler       = "nba_notifications.lambda_handler"
   runtime       = "python3.8"
+  timeout       = 900 # Live games are polled until the invocation is LIVE_POLL_MARGIN seconds from this
 
   environment {
     variables = {
       SNS_TOPIC_ARN = aws_sns_topic.nba_game_alerts.arn
+      STATE_TABLE   = aws_dynamodb_table.nba_game_state.name
     }
   }
 }
@@ -129,7 +172,7 @@ resource "aws_lambda_function" "nba_lambda" {
 # EventBridge Rule for Scheduling
 resource "aws_cloudwatch_event_rule" "nba_schedule" {
   name                = "nba_game_alerts_schedule"
-  schedule_expression = "rate(2 hours)" # Adjust as needed
+  schedule_expression = "rate(15 minutes)" # Each run polls live games for up to the Lambda timeout
 }
 
 # EventBridge Target
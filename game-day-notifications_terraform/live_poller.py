@@ -0,0 +1,96 @@
+import asyncio
+import os
+import random
+import time
+
+# Seconds between polls of the live games, and how close to the Lambda timeout polling stops
+LIVE_POLL_INTERVAL = float(os.getenv("LIVE_POLL_INTERVAL", "30"))
+LIVE_POLL_MARGIN = float(os.getenv("LIVE_POLL_MARGIN", "30"))
+# How often (seconds) the day's schedule is checked again while polling, to pick up games that tip off
+LIVE_SCHEDULE_INTERVAL = float(os.getenv("LIVE_SCHEDULE_INTERVAL", "300"))
+# Retries of a rate-limited (429) request, with jittered exponential backoff capped at this many seconds
+LIVE_MAX_RETRIES = int(os.getenv("LIVE_MAX_RETRIES", "5"))
+LIVE_MAX_BACKOFF = float(os.getenv("LIVE_MAX_BACKOFF", "20"))
+# Per-game box score; one request per live game instead of the whole day's schedule
+LIVE_GAME_URL = os.getenv(
+    "LIVE_GAME_URL",
+    "https://api.sportsdata.io/v3/nba/stats/json/BoxScore/{game_id}?key={api_key}"
+)
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(LIVE_MAX_BACKOFF, 2 ** attempt))
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, float(retry_after))
+    return delay
+
+
+async def fetch_game(session, game_id, api_key):
+    """Fetch one game, backing off on 429. Returns the game in GamesByDate shape."""
+    url = LIVE_GAME_URL.format(game_id=game_id, api_key=api_key)
+    for attempt in range(LIVE_MAX_RETRIES + 1):
+        async with session.get(url) as response:
+            if response.status == 429 and attempt < LIVE_MAX_RETRIES:
+                delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+                print(f"Rate limited on game {game_id}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            response.raise_for_status()
+            box_score = await response.json()
+        # The box score keeps quarter scores next to the game; format_game_data expects them inside it
+        return dict(box_score["Game"], Quarters=box_score.get("Quarters", []))
+
+
+async def poll_live_games(game_ids, api_key, on_update, deadline, interval=LIVE_POLL_INTERVAL,
+                          refresh=None, schedule_interval=LIVE_SCHEDULE_INTERVAL):
+    """
+    Poll the given live games every 'interval' seconds until none is still InProgress
+    or time.monotonic() passes 'deadline'. on_update(games) is called (on a worker thread)
+    with the games fetched in each round. Every 'schedule_interval' seconds, refresh()
+    (also on a worker thread) returns the GameIDs live now, which are added to the polled set.
+    Returns the GameIDs still live when polling stopped.
+    """
+    try:
+        import aiohttp  # Only needed once a game is live
+    except ImportError:
+        # Not in the Lambda runtime; it must be packaged with the function (see README.md)
+        print("aiohttp is not installed, live games are not polled.")
+        return set(game_ids)
+
+    live = set(game_ids)
+    loop = asyncio.get_event_loop()
+    next_refresh = time.monotonic() + schedule_interval
+    timeout = aiohttp.ClientTimeout(total=float(os.getenv("HTTP_TIMEOUT", "10")))
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        while live and time.monotonic() < deadline:
+            started = time.monotonic()
+            if refresh is not None and started >= next_refresh:
+                next_refresh = started + schedule_interval
+                try:
+                    live |= set(await loop.run_in_executor(None, refresh))
+                except Exception as e:
+                    print(f"Error checking the schedule: {e}")
+            polled = list(live)
+            results = await asyncio.gather(
+                *(fetch_game(session, game_id, api_key) for game_id in polled),
+                return_exceptions=True
+            )
+            games = []
+            for game_id, result in zip(polled, results):
+                if isinstance(result, Exception):
+                    print(f"Error polling game {game_id}: {result}")
+                else:
+                    games.append(result)
+            if games:
+                try:
+                    await loop.run_in_executor(None, on_update, games)
+                except Exception as e:
+                    # The next round sees the same changes again, so nothing is lost
+                    print(f"Error processing live games: {e}")
+            # Final (or suspended, postponed...) games drop out of the live set
+            live -= {game["GameID"] for game in games if game.get("Status") != "InProgress"}
+
+            if live:
+                await asyncio.sleep(max(0, min(interval - (time.monotonic() - started), deadline - time.monotonic())))
+    return live
@@ -1,9 +1,25 @@
+import asyncio
 import os
 import json
-import urllib.request
-import boto3
+import time
 from datetime import datetime, timedelta, timezone
 
+from nba_common import LOG_LEVEL, get_client, get_state_store, fetch_games, save_http_cache, process_games
+
+# Poll InProgress games every LIVE_POLL_INTERVAL seconds (live_poller.py) until they are Final
+# or the invocation is LIVE_POLL_MARGIN seconds from its timeout; LIVE_POLLING=false turns it off
+LIVE_POLLING = os.getenv("LIVE_POLLING", "true").lower() == "true"
+LIVE_POLL_MARGIN = float(os.getenv("LIVE_POLL_MARGIN", "30"))
+
+SUBJECT = "NBA Game Updates"
+
+# How long (seconds) the API key from Parameter Store is reused before it is fetched again
+SECRET_TTL = int(os.getenv("SECRET_TTL", "300"))
+
+# The API key lives at module scope, so warm invocations skip the SSM round trip
+_secret_cache = {"value": None, "expires_at": 0.0}
+
+
 def format_game_data(game):
     status = game.get("Status", "Unknown")
     away_team = game.get("AwayTeam", "Unknown")
@@ -50,9 +66,39 @@ def format_game_data(game):
 
 
 def get_secret():
-    ssm = boto3.client("ssm", region_name="us-east-1")
-    response = ssm.get_parameter(Name="nba-api-key", WithDecryption=True)
-    return response["Parameter"]["Value"]
+    now = time.monotonic()
+    if _secret_cache["value"] is None or now >= _secret_cache["expires_at"]:
+        ssm = get_client("ssm", region_name="us-east-1")
+        response = ssm.get_parameter(Name="nba-api-key", WithDecryption=True)
+        _secret_cache["value"] = response["Parameter"]["Value"]
+        _secret_cache["expires_at"] = now + SECRET_TTL
+    return _secret_cache["value"]
+
+
+def check_schedule(api_url, date, store, sns_client, topic_arn):
+    """
+    Fetch the day's games and publish what changed since the last run.
+    Returns (messages sent, messages failed, GameIDs InProgress in the state store).
+    The live games come from the stored state, so they are known even when the payload
+    is unchanged or some messages failed to publish.
+    """
+    data, validators = fetch_games(api_url, date)
+    if data is None:
+        print("Game data unchanged since the last run.")
+        game_ids = validators.get("game_ids", [])
+        sent, failed = 0, 0
+    else:
+        if LOG_LEVEL == "DEBUG":
+            print(json.dumps(data, indent=4))  # Debugging: log the raw data
+        sent, failed = process_games(data, store, sns_client, topic_arn, format_game_data, SUBJECT)
+        game_ids = [game["GameID"] for game in data]
+        # Failed messages are retried from the state, but only after a full fetch
+        if not failed:
+            save_http_cache(dict(validators, game_ids=game_ids))
+
+    states = store.load(game_ids)
+    live_ids = [game_id for game_id, state in states.items() if state.get("status") == "InProgress"]
+    return sent, failed, live_ids
 
 
 def lambda_handler(event, context):
@@ -62,7 +108,7 @@ def lambda_handler(event, context):
         return {"statusCode": 500, "body": "API key retrieval failed"}
     
     sns_topic_arn = os.getenv("SNS_TOPIC_ARN")
-    sns_client = boto3.client("sns")
+    sns_client = get_client("sns")
     
     # Adjust for Central Time (UTC-6)
     utc_now = datetime.now(timezone.utc)
@@ -73,30 +119,33 @@ def lambda_handler(event, context):
     
     # Fetch data from the API
     api_url = f"https://api.sportsdata.io/v3/nba/scores/json/GamesByDate/{today_date}?key={api_key}"
-    print(today_date)
-     
+    store = get_state_store()
+
+    def refresh_schedule():
+        return check_schedule(api_url, today_date, store, sns_client, sns_topic_arn)
+
     try:
-        with urllib.request.urlopen(api_url) as response:
-            data = json.loads(response.read().decode())
-            print(json.dumps(data, indent=4))  # Debugging: log the raw data
+        sent, failed, live_ids = refresh_schedule()
     except Exception as e:
         print(f"Error fetching data from API: {e}")
         return {"statusCode": 500, "body": "Error fetching data"}
-    
-    # Include all games (final, in-progress, and scheduled)
-    messages = [format_game_data(game) for game in data]
-    final_message = "\n---\n".join(messages) if messages else "No games available for today."
-    
-    # Publish to SNS
-    try:
-        sns_client.publish(
-            TopicArn=sns_topic_arn,
-            Message=final_message,
-            Subject="NBA Game Updates"
-        )
-        print("Message published to SNS successfully.")
-    except Exception as e:
-        print(f"Error publishing to SNS: {e}")
+
+    # Once a game has tipped off, follow the live games closely until they finish.
+    # The schedule is checked again while polling, so games that tip off later join in
+    if live_ids and LIVE_POLLING and context is not None:
+        from live_poller import poll_live_games
+        deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - LIVE_POLL_MARGIN
+        print(f"Polling {len(live_ids)} live games...")
+        still_live = asyncio.run(poll_live_games(
+            live_ids, api_key,
+            lambda games: process_games(games, store, sns_client, sns_topic_arn, format_game_data, SUBJECT),
+            deadline,
+            refresh=lambda: refresh_schedule()[2]
+        ))
+        print(f"Live polling stopped with {len(still_live)} games still in progress.")
+
+    if failed:
         return {"statusCode": 500, "body": "Error publishing to SNS"}
-    
-    return {"statusCode": 200, "body": "Data processed and sent to SNS"}
\ No newline at end of file
+    if not sent:
+        return {"statusCode": 200, "body": "No game changes"}
+    return {"statusCode": 200, "body": "Data processed and sent to SNS"}